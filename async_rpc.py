@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+
+# Async JSON-RPC client for fanning out many small reads (reserves, decimals) at once.
+# Requests go through a semaphore (requests in flight) and a token bucket (requests per
+# second, matched to the provider plan), and each one has its own deadline so a slow
+# call fails on its own instead of holding up everything queued behind it.
+
+# Requests in flight at once
+DEFAULT_CONCURRENCY = int(os.getenv("RPC_CONCURRENCY", "16"))
+# Sustained requests per second, and how many may go out back to back
+DEFAULT_RATE = float(os.getenv("RPC_RATE", "25"))
+DEFAULT_BURST = int(os.getenv("RPC_BURST", "0")) or None
+# Seconds allowed per request once it is sent (queueing for a slot doesn't count)
+DEFAULT_DEADLINE = float(os.getenv("RPC_DEADLINE", "10"))
+
+
+class RpcError(Exception):
+    """JSON-RPC error response (e.g. an eth_call that reverted)."""
+
+
+def _reverted(error):
+    # Execution reverted (geth uses code 3 with revert data, others -32000 with a message)
+    return isinstance(error, dict) and (error.get("code") == 3 or "revert" in str(error.get("message", "")).lower())
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average and up to `burst` at once."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(int(rate), 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncRpc:
+    """aiohttp JSON-RPC client; use as `async with AsyncRpc(url) as rpc:`."""
+
+    def __init__(self, url, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 deadline=DEFAULT_DEADLINE):
+        self.url = url
+        self.deadline = deadline
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.session = None
+        self.stats = {"requests": 0, "errors": 0, "timeouts": 0}
+        self._id = 0
+
+    async def __aenter__(self):
+        import aiohttp
+
+        self.session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def _post(self, payload):
+        async with self.session.post(self.url, json=payload) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def request(self, method, params):
+        self._id += 1
+        payload = {"jsonrpc": "2.0", "id": self._id, "method": method, "params": params}
+        async with self.semaphore:
+            await self.bucket.acquire()
+            self.stats["requests"] += 1
+            try:
+                body = await asyncio.wait_for(self._post(payload), self.deadline)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+        if "error" in body:
+            raise RpcError(body["error"])
+        return body["result"]
+
+    async def block_number(self):
+        return int(await self.request("eth_blockNumber", []), 16)
+
+    async def eth_call(self, to, data, block_identifier="latest"):
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+        result = await self.request("eth_call", [{"to": to, "data": "0x" + data.hex()}, block_identifier])
+        return bytes.fromhex(result[2:])
+
+    async def try_eth_call(self, to, data, block_identifier="latest"):
+        """(success, returndata) like a Multicall3 result; reverts come back as (False, b"").
+
+        Any other error (rate limits, node errors, timeouts) is raised, so callers don't
+        cache an outage as a failed call.
+        """
+        try:
+            return True, await self.eth_call(to, data, block_identifier)
+        except RpcError as e:
+            if not _reverted(e.args[0]):
+                raise
+            return False, b""
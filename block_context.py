@@ -0,0 +1,84 @@
+# Block context for gas estimation.
+# Fetches block headers once per block number (and `latest` once per context) so a
+# whole snapshot shares one base fee instead of fetching a block per transaction.
+
+# EIP-1559 constants
+ELASTICITY_MULTIPLIER = 2
+BASE_FEE_MAX_CHANGE_DENOMINATOR = 8
+
+
+def next_base_fee(base_fee, gas_used, gas_limit):
+    """Base fee of the child block per the EIP-1559 update rule."""
+    gas_target = gas_limit // ELASTICITY_MULTIPLIER
+    if gas_target == 0 or gas_used == gas_target:
+        return base_fee
+    if gas_used > gas_target:
+        delta = max(base_fee * (gas_used - gas_target) // gas_target // BASE_FEE_MAX_CHANGE_DENOMINATOR, 1)
+        return base_fee + delta
+    delta = base_fee * (gas_target - gas_used) // gas_target // BASE_FEE_MAX_CHANGE_DENOMINATOR
+    return base_fee - delta
+
+
+class BlockContext:
+    """Per-snapshot cache of block headers and base fees."""
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._headers = {}
+        self._latest = None
+
+    def header(self, block_identifier="latest"):
+        """Header fields needed for fee math; `latest` is resolved once and pinned."""
+        if block_identifier == "latest":
+            if self._latest is None:
+                block = self.w3.eth.get_block("latest")
+                self._latest = block["number"]
+                self._headers[self._latest] = self._fields(block)
+            return self._headers[self._latest]
+        if block_identifier not in self._headers:
+            self._headers[block_identifier] = self._fields(self.w3.eth.get_block(block_identifier))
+        return self._headers[block_identifier]
+
+    @staticmethod
+    def _fields(block):
+        return {
+            "number": block["number"],
+            "baseFeePerGas": block.get("baseFeePerGas"),
+            "gasUsed": block["gasUsed"],
+            "gasLimit": block["gasLimit"],
+        }
+
+    def base_fee(self, block_identifier="latest"):
+        """Base fee of the block, or None when unavailable (pre-London or RPC failure)."""
+        try:
+            return self.header(block_identifier)["baseFeePerGas"]
+        except Exception:
+            return None
+
+    def predicted_base_fee(self, block_identifier="latest"):
+        """Base fee the block after `block_identifier` will have; pending txs land there."""
+        try:
+            h = self.header(block_identifier)
+        except Exception:
+            return None
+        if h["baseFeePerGas"] is None:
+            return None
+        return next_base_fee(h["baseFeePerGas"], h["gasUsed"], h["gasLimit"])
+
+
+def effective_gas_prices(trades, base_fee):
+    """Effective gas price for every trade in one pass (legacy gasPrice, else EIP-1559 estimate)."""
+    out = []
+    for t in trades:
+        gas_price = t.get("gasPrice")
+        max_fee = t.get("maxFeePerGas")
+        max_prio = t.get("maxPriorityFeePerGas")
+        if gas_price:
+            out.append(gas_price)
+        elif base_fee is not None:
+            eff = base_fee + (max_prio or 0)
+            out.append(min(max_fee or eff, eff))
+        else:
+            # Fallback when base fee unavailable: use maxFeePerGas or priority fee
+            out.append(max_fee or max_prio)
+    return out
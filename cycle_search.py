@@ -0,0 +1,135 @@
+import math
+import time
+from transaction import TransactionBatch
+
+# Multi-hop cycle search over a batch.
+# Filling a pending src->dst tx (q src at r dst per src) means paying r*q dst and
+# receiving q src, so to a searcher every tx is an edge dst->src with multiplier 1/r.
+# Edges are aggregated to the best rate per directed pair and weighted by log(1/r);
+# a cycle through the base asset with a positive total log-rate returns more of the
+# base asset than it started with. Cycles are found with a layered Bellman-Ford from
+# the base asset (layer k holds the best simple walk of exactly k hops to each token),
+# which bounds the cycle length and runs each layer as one NumPy relaxation over all edges.
+# This is a heuristic: keeping one walk per token per layer can miss a profitable cycle
+# whose prefix to some token loses to a walk through one of the cycle's later tokens.
+# It is exact for cycles of up to 3 hops.
+
+# Hops per cycle
+DEFAULT_MAX_LENGTH = 4
+# Seconds allowed for the search; layers not reached by then are skipped
+DEFAULT_BUDGET = 0.05
+# Ignore cycles returning less than this fraction on top of the input
+MIN_GAIN = 1e-9
+
+
+def rate_graph(batch):
+    """Best searcher edge per directed pair: (batch, u ids, v ids, log-rates, batch row of the tx used)."""
+    import numpy as np
+
+    if not isinstance(batch, TransactionBatch):
+        batch = TransactionBatch.from_transactions(batch)
+    src, dst, q, r = batch.src, batch.dst, batch.q, batch.r
+    usable = np.flatnonzero((src != dst) & (q > 0) & (r > 0) & np.isfinite(q) & np.isfinite(r))
+    u, v = dst[usable], src[usable]
+    weight = -np.log(r[usable])
+    # Best rate per (u, v); lexsort is stable, so ties keep the earliest tx
+    codes = u * max(len(batch.tokens), 1) + v
+    order = np.lexsort((-weight, codes))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = codes[order][1:] != codes[order][:-1]
+    best = order[first]
+    return batch, u[best], v[best], weight[best], usable[best]
+
+
+def find_cycles(batch, exo, base_asset, max_length=DEFAULT_MAX_LENGTH, budget=DEFAULT_BUDGET, top=10):
+    """Profitable cycles base -> ... -> base of at most `max_length` hops, best first.
+
+    Heuristic beyond 3 hops (see the module comment): every cycle returned is real and
+    simple, but longer profitable cycles can be missed. Each cycle is a dict with the tokens visited, the txs filled at each hop, the
+    round-trip rate, the largest base input every hop can absorb and the profit at that
+    size (in base units, and in USD when `exo` prices the base asset).
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    batch, edge_u, edge_v, weight, rows = rate_graph(batch)
+    tokens = batch.tokens
+    if base_asset not in tokens or not len(weight):
+        return []
+    base = tokens.index(base_asset)
+    n = len(tokens)
+
+    # dist[v]: best log-rate of a simple walk base -> v with exactly k hops;
+    # walk[v] / walk_edges[v]: its tokens and edges (rows of unreached tokens are unused)
+    dist = np.full(n, -np.inf)
+    dist[base] = 0.0
+    walk = np.full((n, 1), base, dtype=np.int64)
+    walk_edges = np.zeros((n, 0), dtype=np.int64)
+    closing = np.flatnonzero(edge_v == base)
+    found = {}
+    for k in range(1, max_length + 1):
+        if time.perf_counter() - started > budget:
+            print(f"Cycle search stopped at {k - 1} hops (budget {budget}s)")
+            break
+        candidate = dist[edge_u] + weight
+        # Walks that close the cycle at this layer (simple, since every kept walk is)
+        for e in closing[candidate[closing] > math.log1p(MIN_GAIN)].tolist():
+            u = int(edge_u[e])
+            path = walk[u].tolist() + [base]
+            found.setdefault(tuple(path), (float(candidate[e]), walk_edges[u].tolist() + [e]))
+        if k == max_length:
+            break
+        # Only extend walks to tokens they haven't visited, so a repeating walk can never
+        # win a token's slot over a simple one
+        candidate[(walk[edge_u] == edge_v[:, None]).any(axis=1)] = -np.inf
+        nxt = np.full(n, -np.inf)
+        np.maximum.at(nxt, edge_v, candidate)
+        # Cycles end at the base; walks don't pass through it
+        nxt[base] = -np.inf
+        reached = np.isfinite(candidate) & (candidate == nxt[edge_v])
+        parent = np.full(n, -1, dtype=np.int64)
+        parent[edge_v[reached]] = np.flatnonzero(reached)
+        tips = np.flatnonzero(parent >= 0)
+        extended = np.full((n, k + 1), -1, dtype=np.int64)
+        extended[tips, :k] = walk[edge_u[parent[tips]]]
+        extended[tips, k] = tips
+        extended_edges = np.zeros((n, k), dtype=np.int64)
+        extended_edges[tips, :k - 1] = walk_edges[edge_u[parent[tips]]]
+        extended_edges[tips, k - 1] = parent[tips]
+        walk, walk_edges, dist = extended, extended_edges, nxt
+        if not np.isfinite(dist).any():
+            break
+
+    cycles = []
+    for path, (log_rate, edges) in sorted(found.items(), key=lambda item: -item[1][0])[:top]:
+        txs = [batch[int(rows[e])] for e in edges]
+        # Largest input: hop i receives input * (product of earlier rates) and can take at most r*q
+        amount_in, scale = float("inf"), 1.0
+        for tx in txs:
+            amount_in = min(amount_in, tx.r * tx.q / scale)
+            scale /= tx.r
+        rate = math.exp(log_rate)
+        profit = amount_in * (rate - 1)
+        price = exo.get(base_asset, 0)
+        cycles.append({
+            "cycle": [tokens[i] for i in path],
+            "txs": txs,
+            "rate": rate,
+            "amount_in": amount_in,
+            "profit": profit,
+            "profit_usd": profit * price if price > 0 else None,
+        })
+    return cycles
+
+
+if __name__ == "__main__":
+    from transaction import Transaction
+
+    # Paper example with a generous C->A tx: pay A for C, C for B, B for A
+    example_batch = [
+        Transaction("A", "B", 2, 0.5),
+        Transaction("B", "C", 1, 4),
+        Transaction("C", "A", 4, 0.4)
+    ]
+    exo = {"A": 1.0, "B": 1.0, "C": 1.0}
+    print(find_cycles(example_batch, exo, "A"))
@@ -0,0 +1,102 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from swap_decoder import SWAP_FUNCTIONS, decode_args
+
+# Parallel decode engine for filtered router txs.
+# The CPU-bound part (calldata decode, hex -> int of gas fields, building the trade
+# dict) is sharded across worker processes; everything that needs the network
+# (token metadata, base fee) is left to the caller so it can be done once, in bulk,
+# over the merged results.
+
+# Below this many txs process startup costs more than it saves
+PARALLEL_THRESHOLD = 2000
+# Shards per worker; a few per worker keeps cores busy when shard costs vary
+SHARDS_PER_WORKER = 4
+
+
+def _hex_to_int(x):
+    if x is None:
+        return None
+    if isinstance(x, int):
+        return x
+    if isinstance(x, str):
+        try:
+            return int(x, 16) if x.startswith("0x") else int(x)
+        except Exception:
+            return None
+    return None
+
+
+def decode_tx(tx):
+    """Decodes one pending router tx.
+
+    Returns ("trade", trade) with `path` left as raw addresses, ("unknown", selector)
+    for non-swap selectors, or ("error", message) for calldata that fails to decode.
+    """
+    input_data = tx["input"]
+    fn_selector = input_data[:10]
+    if fn_selector not in SWAP_FUNCTIONS:
+        return "unknown", fn_selector
+
+    abi_entry = SWAP_FUNCTIONS[fn_selector]
+    try:
+        # Fixed-offset fast path, eth_abi only for malformed calldata
+        decoded = decode_args(fn_selector, input_data[10:])
+    except Exception as e:
+        return "error", f"Selector {fn_selector}: decode exception {type(e).__name__}: {e}"
+
+    # dynamically include all decoded arguments without assuming field names
+    trade = {"function": abi_entry["name"]}
+    for inp, v in zip(abi_entry["inputs"], decoded):
+        if isinstance(v, bytes):
+            v = v.hex()
+        trade[inp["name"]] = v
+
+    # carry over gas-related fields from mempool tx
+    trade.update({
+        "gas": _hex_to_int(tx.get("gas")),
+        "gasPrice": _hex_to_int(tx.get("gasPrice")),
+        "maxFeePerGas": _hex_to_int(tx.get("maxFeePerGas")),
+        "maxPriorityFeePerGas": _hex_to_int(tx.get("maxPriorityFeePerGas")),
+        "type": _hex_to_int(tx.get("type")) if tx.get("type") is not None else None,
+        # Filled by the caller for the whole batch from a single base fee
+        "effectiveGasPrice": None,
+        "hash": tx.get("hash"),
+        "from": tx.get("from"),
+        "to_router": tx.get("to"),
+        "nonce": _hex_to_int(tx.get("nonce")),
+        "value": _hex_to_int(tx.get("value")),
+    })
+    # Raw addresses; metadata is resolved in bulk after decoding
+    trade["path"] = list(trade["path"])
+    return "trade", trade
+
+
+def _decode_shard(txs):
+    return [decode_tx(tx) for tx in txs]
+
+
+def decode_transactions(txs, workers=None):
+    """Decodes `txs` across a process pool; results come back in input order."""
+    txs = list(txs)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(txs) < PARALLEL_THRESHOLD:
+        return _decode_shard(txs)
+
+    shard_size = -(-len(txs) // (workers * SHARDS_PER_WORKER))
+    shards = [txs[i:i + shard_size] for i in range(0, len(txs), shard_size)]
+    # Never fork: the caller may already run threads (rpc_pool health probes, multicall
+    # chunk threads) whose locks a forked child would inherit mid-acquire. Workers start
+    # from a clean forkserver (spawn where there is none) and only import the decoder.
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    if ctx.get_start_method() == "forkserver":
+        # Workers fork from a server that already imported the decoder
+        ctx.set_forkserver_preload(["decode_pipeline"])
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        for shard_results in pool.map(_decode_shard, shards):
+            results.extend(shard_results)
+    return results
+
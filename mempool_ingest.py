@@ -0,0 +1,342 @@
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+
+# Continuous mempool ingestion.
+# Keeps a rolling pending pool keyed by (sender, nonce) that is fed either by polling
+# `txpool_content` or by a websocket `eth_subscribe` stream, and evicts txs once they
+# are mined or dropped. The pool can be dumped in the same shape as `sample.dump`
+# so the decode script keeps working on a fresh view of the mempool.
+
+# Samples kept for arrival-to-available latency percentiles
+LATENCY_WINDOW = 10000
+# Pending txs not seen again for this long are re-checked with the node (websocket mode)
+DEFAULT_MAX_AGE = 600.0
+# Seconds before the first websocket reconnect; doubles per failed attempt up to the max
+RECONNECT_BACKOFF = 1.0
+MAX_RECONNECT_BACKOFF = 60.0
+
+
+def _to_int(x):
+    if isinstance(x, int):
+        return x
+    return int(x, 16) if x.startswith("0x") else int(x)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples` (None when empty)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class RollingPool:
+    """In-memory pending pool keyed by (sender, nonce) with mined/dropped eviction."""
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE):
+        self.max_age = max_age
+        self.txs = {}
+        self.last_seen = {}
+        self.nonces_by_sender = {}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.added = 0
+        self.replaced = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.txs)
+
+    def add(self, tx, arrived_at):
+        """Inserts or replaces a pending tx.
+
+        `arrived_at` is the monotonic time the tx reached us (websocket) or the latest time
+        it could have reached the node (polling); None records no latency sample.
+        """
+        sender = tx["from"].lower()
+        key = (sender, _to_int(tx["nonce"]))
+        now = time.monotonic()
+        old = self.txs.get(key)
+        if old is None:
+            self.added += 1
+            self.nonces_by_sender.setdefault(sender, set()).add(key[1])
+        elif old.get("hash") != tx.get("hash"):
+            # Same sender/nonce with a new hash is a fee bump or cancellation
+            self.replaced += 1
+        else:
+            self.last_seen[key] = now
+            return key
+        self.txs[key] = tx
+        self.last_seen[key] = now
+        if arrived_at is not None:
+            self.latencies.append(now - arrived_at)
+        return key
+
+    def touch(self, key, now=None):
+        """Marks a pending tx as still pending."""
+        if key in self.txs:
+            self.last_seen[key] = time.monotonic() if now is None else now
+
+    def remove(self, key):
+        if self.txs.pop(key, None) is None:
+            return False
+        self.last_seen.pop(key, None)
+        nonces = self.nonces_by_sender.get(key[0])
+        if nonces is not None:
+            nonces.discard(key[1])
+            if not nonces:
+                del self.nonces_by_sender[key[0]]
+        self.evicted += 1
+        return True
+
+    def evict_mined(self, sender, nonce):
+        """Drops every pending tx of `sender` with nonce <= the mined `nonce`."""
+        nonces = self.nonces_by_sender.get(sender.lower())
+        if not nonces:
+            return 0
+        stale = [n for n in nonces if n <= nonce]
+        for n in stale:
+            self.remove((sender.lower(), n))
+        return len(stale)
+
+    def stale(self, now=None):
+        """Keys of txs not seen for `max_age` seconds; the caller re-checks them with the node."""
+        if self.max_age is None:
+            return []
+        now = time.monotonic() if now is None else now
+        return [k for k, t in self.last_seen.items() if now - t > self.max_age]
+
+    def sync(self, pending, arrived_at):
+        """Applies a full `txpool_content` pending section as a delta against the pool.
+
+        New txs reached the node after the previous response was taken, so `arrived_at`
+        is when the previous poll was sent (None for the first poll, whose txs have no
+        known arrival time).
+        """
+        seen = set()
+        for sender, txs in pending.items():
+            for tx in txs.values():
+                seen.add(self.add(tx, arrived_at))
+        # Anything no longer reported by the node was mined or dropped
+        for key in [k for k in self.txs if k not in seen]:
+            self.remove(key)
+
+    def latency_stats(self):
+        """Returns p50/p99 arrival-to-available latency in milliseconds."""
+        samples = list(self.latencies)
+        p50 = percentile(samples, 50)
+        p99 = percentile(samples, 99)
+        return {
+            "samples": len(samples),
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p99_ms": p99 * 1000 if p99 is not None else None,
+        }
+
+    def snapshot(self):
+        """Returns the pool in `txpool_content` response shape."""
+        pending = {}
+        for (sender, nonce), tx in self.txs.items():
+            pending.setdefault(sender, {})[str(nonce)] = tx
+        return {"jsonrpc": "2.0", "id": 1, "result": {"pending": pending, "queued": {}}}
+
+    def dump(self, path):
+        # Write to a temp file and swap so readers never see a partial dump
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+
+async def poll_txpool(pool, url, interval=2.0, timeout=20.0):
+    """Polls `txpool_content` and applies each response to `pool` as a delta."""
+    import aiohttp
+
+    payload = {"method": "txpool_content", "id": 1, "jsonrpc": "2.0"}
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    # Send time of the last successful poll: a tx missing from that response reached
+    # the node after it, so latencies measured from it are upper bounds that include
+    # the poll interval, the download and the delta
+    last_sent = None
+    async with aiohttp.ClientSession(timeout=client_timeout) as session:
+        while True:
+            started = time.monotonic()
+            try:
+                async with session.post(url, json=payload) as resp:
+                    body = await resp.read()
+                pending = json.loads(body)["result"]["pending"]
+                pool.sync(pending, last_sent)
+                last_sent = started
+            except Exception as e:
+                print(f"txpool_content poll failed: {type(e).__name__}: {e}")
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(interval - elapsed, 0))
+
+
+async def subscribe_pending(pool, ws_url):
+    """Streams full pending txs over `eth_subscribe` and evicts txs included in new heads.
+
+    Runs until the connection ends, then raises ConnectionError (even on a clean close);
+    stream_pending reconnects.
+    """
+    import websockets
+
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        next_id = 1
+        waiters = {}
+
+        async def request(method, params):
+            nonlocal next_id
+            if reader.done():
+                raise ConnectionError("websocket closed")
+            req_id = next_id
+            next_id += 1
+            fut = asyncio.get_running_loop().create_future()
+            waiters[req_id] = fut
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params}))
+            return await fut
+
+        async def recheck(key):
+            # Still pending (no block yet) keeps it; mined or unknown to the node drops it
+            pending = pool.txs.get(key)
+            if pending is None:
+                return
+            tx = await request("eth_getTransactionByHash", [pending["hash"]])
+            # Unless it was mined or replaced in the meantime
+            if (tx is None or tx.get("blockNumber") is not None) and pool.txs.get(key) is pending:
+                pool.remove(key)
+
+        async def evict_block(block_hash):
+            try:
+                block = await request("eth_getBlockByHash", [block_hash, True])
+            except Exception as e:
+                print(f"Block fetch failed for {block_hash}: {e}")
+                return
+            for tx in (block or {}).get("transactions", []):
+                pool.evict_mined(tx["from"], _to_int(tx["nonce"]))
+            # Pending txs are only streamed once, so silence says nothing: ask the node.
+            # Touched first so the next head doesn't re-check them while this one runs.
+            stale = pool.stale()
+            for key in stale:
+                pool.touch(key)
+            results = await asyncio.gather(*(recheck(key) for key in stale), return_exceptions=True)
+            failed = [r for r in results if isinstance(r, Exception)]
+            if failed:
+                print(f"Re-check failed for {len(failed)} of {len(stale)} stale txs: {failed[0]!r}")
+
+        reader = asyncio.create_task(_read_ws(ws, pool, waiters, evict_block))
+        try:
+            pending_sub = await request("eth_subscribe", ["newPendingTransactions", True])
+            heads_sub = await request("eth_subscribe", ["newHeads"])
+            print(f"Subscribed: pending={pending_sub} heads={heads_sub}")
+            await reader
+        finally:
+            reader.cancel()
+    raise ConnectionError("websocket closed")
+
+
+async def stream_pending(pool, ws_url, backoff=RECONNECT_BACKOFF, max_backoff=MAX_RECONNECT_BACKOFF):
+    """subscribe_pending, reconnecting with exponential backoff whenever the connection ends.
+
+    Txs broadcast while disconnected are missed; the pool keeps what it has, and stale
+    txs are still re-checked once the stream is back.
+    """
+    delay = backoff
+    while True:
+        started = time.monotonic()
+        try:
+            await subscribe_pending(pool, ws_url)
+        except Exception as e:
+            print(f"Pending stream lost: {type(e).__name__}: {e}")
+        # A connection that lasted a while starts the backoff over
+        if time.monotonic() - started > max_backoff:
+            delay = backoff
+        print(f"Reconnecting in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_backoff)
+
+
+def _head_done(task, tasks):
+    tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"New head handling failed: {task.exception()!r}")
+
+
+async def _read_ws(ws, pool, waiters, on_head):
+    # Single reader task: routes responses to waiters and subscription events to the pool
+    # Head handlers run as tasks; the loop only keeps weak references, so hold them here
+    tasks = set()
+    try:
+        async for message in ws:
+            arrived_at = time.monotonic()
+            msg = json.loads(message)
+            if "id" in msg and msg["id"] in waiters:
+                fut = waiters.pop(msg["id"])
+                if fut.done():
+                    continue
+                if "error" in msg:
+                    fut.set_exception(RuntimeError(msg["error"]))
+                else:
+                    fut.set_result(msg.get("result"))
+                continue
+            if msg.get("method") != "eth_subscription":
+                continue
+            result = msg["params"]["result"]
+            if isinstance(result, dict) and "nonce" in result and "from" in result:
+                pool.add(result, arrived_at)
+            elif isinstance(result, dict) and "hash" in result:
+                task = asyncio.create_task(on_head(result["hash"]))
+                tasks.add(task)
+                task.add_done_callback(lambda t: _head_done(t, tasks))
+    finally:
+        # No more responses can arrive: fail whatever is still waiting for one
+        for fut in waiters.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError("websocket closed"))
+        waiters.clear()
+
+
+async def report(pool, interval=10.0, dump_path=None):
+    """Periodically prints pool size and latency percentiles, optionally dumping the pool."""
+    while True:
+        await asyncio.sleep(interval)
+        stats = pool.latency_stats()
+        p50 = f"{stats['p50_ms']:.2f}ms" if stats["p50_ms"] is not None else "n/a"
+        p99 = f"{stats['p99_ms']:.2f}ms" if stats["p99_ms"] is not None else "n/a"
+        print(
+            f"Pool size={len(pool)} added={pool.added} replaced={pool.replaced} "
+            f"evicted={pool.evicted} latency p50={p50} p99={p99}"
+        )
+        if dump_path:
+            pool.dump(dump_path)
+
+
+async def run(url=None, ws_url=None, interval=2.0, report_interval=10.0, dump_path=None, max_age=DEFAULT_MAX_AGE):
+    pool = RollingPool(max_age=max_age)
+    source = stream_pending(pool, ws_url) if ws_url else poll_txpool(pool, url, interval)
+    await asyncio.gather(source, report(pool, report_interval, dump_path))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Continuously ingest the pending mempool")
+    parser.add_argument("--url", default=os.getenv("QUICKNODE_ENDPOINT"), help="HTTP JSON-RPC endpoint for txpool_content polling")
+    parser.add_argument("--ws", default=None, help="websocket endpoint; subscribes instead of polling")
+    parser.add_argument("--interval", type=float, default=2.0, help="poll interval in seconds")
+    parser.add_argument("--report", type=float, default=10.0, help="stats/dump interval in seconds")
+    parser.add_argument("--dump", default="sample.dump", help="path to write the rolling pool to ('' to disable)")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE,
+                        help="with --ws, seconds without news before a pending tx is re-checked with the node (0 disables)")
+    args = parser.parse_args(argv)
+
+    if not args.ws and not args.url:
+        raise SystemExit("Set QUICKNODE_ENDPOINT, --url or --ws")
+    asyncio.run(run(args.url, args.ws, args.interval, args.report, args.dump or None, args.max_age or None))
+
+
+if __name__ == "__main__":
+    main()
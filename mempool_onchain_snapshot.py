@@ -1,19 +1,65 @@
+import argparse
 import os
-import requests
+import time
 import json
+from snapshot_delta import DEFAULT_REBASE_EVERY, DeltaWriter
+from snapshot_store import iter_pending, write_snapshot
 
 # Straightforward. Access mempool and dump to file.
-ENDPOINT_URL = os.environ["QUICKNODE_ENDPOINT"]
+ENDPOINT_URL = os.getenv("QUICKNODE_ENDPOINT")
+
+# Extra endpoints that serve txpool_content (comma-separated); not every provider does
+TXPOOL_URLS = [u.strip() for u in os.getenv("TXPOOL_URLS", "").split(",") if u.strip()]
+
+# txpool_content responses run to hundreds of MB: allow a long download and don't
+# start it over on another endpoint when it times out (the next poll tries again).
+# Rate limits, 5xx and connection errors still fail over to the next endpoint.
+TXPOOL_TIMEOUT = float(os.getenv("TXPOOL_TIMEOUT", "600"))
 
 payload = json.dumps({"method":"txpool_content","id":1,"jsonrpc":"2.0"})
 
-headers = {
-  'Content-Type': 'application/json'
-}
 
-response = requests.request("POST", ENDPOINT_URL, headers=headers, data=payload)
-response = response.json()
+def fetch_txpool(url=None):
+    from rpc_pool import get_pool
+
+    # One keep-alive session per endpoint, reused across polls, with failover between them
+    urls = [url] if url else [u for u in [ENDPOINT_URL] + TXPOOL_URLS if u]
+    if not urls:
+        raise RuntimeError("Set QUICKNODE_ENDPOINT to snapshot the mempool.")
+    return json.loads(get_pool(urls).post(payload.encode(), timeout=TXPOOL_TIMEOUT, retry_read_timeout=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot the pending mempool")
+    parser.add_argument("--format", choices=["json", "columnar", "delta"], default="json",
+                        help="json writes the raw txpool_content response, columnar the mmap-able store, "
+                             "delta appends add/remove records to a snapshot log")
+    parser.add_argument("--out", default=None, help="output path (sample.dump / sample.snap / sample.delta by default)")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="with --format delta, keep snapshotting every N seconds")
+    parser.add_argument("--rebase-every", type=int, default=DEFAULT_REBASE_EVERY,
+                        help="with --format delta, number of deltas before a new base is written")
+    args = parser.parse_args(argv)
+
+    if args.format == "delta":
+        out = args.out or "sample.delta"
+        writer = DeltaWriter(out, rebase_every=args.rebase_every)
+        while True:
+            added, removed = writer.append(fetch_txpool()["result"]["pending"])
+            print(f"seq {writer.seq}: +{added} -{removed} ({len(writer.state)} pending) -> {out}")
+            if args.interval <= 0:
+                break
+            time.sleep(args.interval)
+    else:
+        response = fetch_txpool()
+        if args.format == "columnar":
+            out = args.out or "sample.snap"
+            count = write_snapshot(out, iter_pending(response["result"]["pending"]))
+            print(f"Wrote {count} pending txs to {out}")
+        else:
+            with open(args.out or 'sample.dump','w') as f:
+                f.write(json.dumps(response))
 
-with open('sample.dump','w') as f:
-    f.write(json.dumps(response))
 
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from transaction import Transaction
+import random
+from transaction import Transaction, TransactionBatch
 
 # Computes the profit
 def helper(src, dst, q, r, exo):
@@ -7,6 +8,9 @@ def helper(src, dst, q, r, exo):
 # Minimal positive threshold to avoid executing zero/negative-profit batches
 EPSILON = 1e-9
 
+# Uniswap V2 swap fee
+POOL_FEE = 0.003
+
 # Argmax function of max cumulative profit
 def cumulative_argmax(values):
     running, best_val, best_idx = 0, float('-inf'), -1
@@ -16,85 +20,224 @@ def cumulative_argmax(values):
             best_val, best_idx = running, i
     return best_idx, best_val
 
+def _skip(tx, exo):
+    print(
+        f"Skipping unrealistic ratio {tx.src}->{tx.dst}: "
+        f"src={exo.get(tx.src)}, dst={exo.get(tx.dst)}"
+    )
+
+
+def _mediated(executed, src, dst):
+    # Mediator batch settling the executed prefix in the opposite direction
+    total_qty = sum(tx.q for tx in executed)
+    avg_rate = sum(tx.r * tx.q for tx in executed) / max(total_qty, 1e-12)
+    return executed + [Transaction(src, dst, total_qty, 1 / avg_rate)]
+
+
+def _pair_slots(assets, base_assets):
+    # (base, other) -> slot for every pair, in output order. A pair of two bases belongs
+    # to the one listed first, so each pair (and every tx in it) is claimed exactly once.
+    slots = {}
+    claimed = set()
+    for base in base_assets:
+        for other in assets:
+            if other != base and other not in claimed:
+                slots[(base, other)] = len(slots)
+        claimed.add(base)
+    return slots
+
+
+def _decide(base_asset, j, profit1, profit2):
+    # Decision text and the direction to execute (0 forward, 1 reverse, None for nothing)
+    if profit1 <= EPSILON and profit2 <= EPSILON:
+        return "Do nothing", None
+    if profit1 >= profit2 and profit1 > EPSILON:
+        return f"Execute {base_asset}->{j} and mediator ({j}->{base_asset})", 0
+    if profit2 > EPSILON:
+        return f"Execute {j}->{base_asset} and mediator ({base_asset}->{j})", 1
+    return "Do nothing", None
+
+
+def amount_out(amount_in, reserve_in, reserve_out):
+    # Uniswap V2 getAmountOut in token units (works on floats and arrays)
+    amount_in_with_fee = amount_in * (1 - POOL_FEE)
+    return amount_in_with_fee * reserve_out / (reserve_in + amount_in_with_fee)
+
+
+def _depth(reserves, token_in, token_out):
+    # (reserve_in, reserve_out) of the pool, or NaNs when there is no funded pool
+    if (token_in, token_out) in reserves:
+        return reserves[(token_in, token_out)]
+    if (token_out, token_in) in reserves:
+        return reserves[(token_out, token_in)][::-1]
+    return float('nan'), float('nan')
+
+
+def _apply_price_impact(best, reserves, exo, slots, q, r, kept, order, sorted_segments, starts, ends):
+    # A src->dst prefix hands the searcher sum(q) src and owes sum(q*r) dst. Selling the
+    # src into the pool returns amount_out(sum(q)), so the prefix is worth
+    # exo[dst] * (amount_out(sum(q)) - sum(q*r)). Evaluated for every prefix of every
+    # direction as one array expression, then the first maximum of each direction wins.
+    import numpy as np
+
+    # Pool depths and output price of each direction that has txs (dict lookups)
+    pairs = {slot: pair for pair, slot in slots.items()}
+    present = sorted_segments[starts].tolist()
+    depth_in, depth_out, price_out = (np.empty(len(present)) for _ in range(3))
+    for i, segment in enumerate(present):
+        base, other = pairs[segment // 2]
+        token_in, token_out = (base, other) if segment % 2 == 0 else (other, base)
+        depth_in[i], depth_out[i] = _depth(reserves, token_in, token_out)
+        price_out[i] = exo.get(token_out, np.nan)
+
+    # Running sums restart at every direction: one cumsum over all rows, minus the
+    # total reached before each direction starts
+    rows = kept[order]
+    lengths = ends - starts
+    filled, owed = np.cumsum(q[rows]), np.cumsum(q[rows] * r[rows])
+    filled -= np.repeat(np.concatenate(([0.0], filled[ends[:-1] - 1])), lengths)
+    owed -= np.repeat(np.concatenate(([0.0], owed[ends[:-1] - 1])), lengths)
+
+    depth_in, depth_out, price_out = (np.repeat(a, lengths) for a in (depth_in, depth_out, price_out))
+    value = price_out * (amount_out(filled, depth_in, depth_out) - owed)
+    top = np.maximum.reduceat(value, starts)
+    positions = np.where(value == np.repeat(top, lengths), np.arange(len(value)), len(value))
+    first = np.minimum.reduceat(positions, starts)
+    # NaN: no pool for this direction, keep the exo valuation
+    priced = np.flatnonzero(~np.isnan(top))
+    for i, segment, k, peak in zip(priced.tolist(), np.asarray(present)[priced].tolist(),
+                                   (first - starts)[priced].tolist(), top[priced].tolist()):
+        best[segment] = (rows[starts[i]:ends[i]], k, peak)
+
+
 # Computes transaction to profit off of target asset.
 # Implementation of algorithm presented in paper
-def compute_batch(batch, exo, base_asset="A"):
-    assets = sorted({tx.src for tx in batch} | {tx.dst for tx in batch})
+def compute_batch(batch, exo, base_asset="A", verbose=True, reserves=None):
+    return compute_batch_multi(batch, exo, [base_asset], verbose, reserves)
+
+
+def _columns(batch):
+    # (tokens, src ids, dst ids, q, r, row getter) for a TransactionBatch or a list of Transactions
+    if isinstance(batch, TransactionBatch):
+        return batch.tokens, batch.src, batch.dst, batch.q, batch.r, batch.__getitem__
+    import numpy as np
+
+    tokens, ids = [], {}
+    src = np.empty(len(batch), dtype=np.int64)
+    dst = np.empty(len(batch), dtype=np.int64)
+    for i, tx in enumerate(batch):
+        for side, token in ((src, tx.src), (dst, tx.dst)):
+            if token not in ids:
+                ids[token] = len(tokens)
+                tokens.append(token)
+            side[i] = ids[token]
+    q = np.array([tx.q for tx in batch], dtype=np.float64)
+    r = np.array([tx.r for tx in batch], dtype=np.float64)
+    return tokens, src, dst, q, r, batch.__getitem__
+
+
+# Same optimization for several base assets (in priority order) in one pass.
+# Txs are grouped by (pair, direction) once and profits are evaluated with NumPy;
+# a stable (segment, r) sort plus a per-segment cumsum/argmax stands in for sorting and
+# scanning every direction separately, with the same results as the per-asset loop.
+# `batch` is a list of Transactions or a TransactionBatch; only executed rows become objects.
+# With `reserves` ({(token_a, token_b): (reserve_a, reserve_b)} in token units, see
+# token_pricing.fetch_pool_depths) every prefix is valued by selling its total into the
+# pool instead of at exo prices, and the best prefix is picked on that; pairs without
+# reserves keep the exo valuation.
+def compute_batch_multi(batch, exo, base_assets, verbose=True, reserves=None):
+    import numpy as np
+
+    base_assets = list(dict.fromkeys(base_assets))
+    tokens, src, dst, q, r, row = _columns(batch)
+    present = np.unique(np.concatenate((src, dst))).tolist()
+    assets = sorted(tokens[i] for i in present)
+    slots = _pair_slots(assets, base_assets)
     results = {}
 
-    for j in [a for a in assets if a != base_asset]:
-        print(f"Pair ({base_asset}, {j})")
-        # Forward direction tau_1 -> tau_j
-        fwd = []
-        for tx in [t for t in batch if t.src == base_asset and t.dst == j]:
-            if (
-                exo.get(tx.src, 0) <= 0
-                or exo.get(tx.dst, 0) <= 0
-            ):
-                print(
-                    f"Skipping unrealistic ratio {tx.src}->{tx.dst}: "
-                    f"src={exo.get(tx.src)}, dst={exo.get(tx.dst)}"
-                )
-                continue
-            fwd.append(tx)
-
-        fwd.sort(key=lambda x: x.r)
-        fwd_profits = [helper(tx.src, tx.dst, tx.q, tx.r, exo) for tx in fwd]
-        k1, profit1 = cumulative_argmax(fwd_profits)
-
-        # Reverse direction tau_j -> tau_1
-        rev = []
-        for tx in [t for t in batch if t.src == j and t.dst == base_asset]:
-            if (
-                exo.get(tx.src, 0) <= 0
-                or exo.get(tx.dst, 0) <= 0
-            ):
-                print(
-                    f"Skipping unrealistic ratio {tx.src}->{tx.dst}: "
-                    f"src={exo.get(tx.src)}, dst={exo.get(tx.dst)}"
-                )
-                continue
-            rev.append(tx)
-
-        rev.sort(key=lambda x: x.r)
-        rev_profits = [helper(tx.src, tx.dst, tx.q, tx.r, exo) for tx in rev]
-        k2, profit2 = cumulative_argmax(rev_profits)
-
-        if profit1 <= EPSILON and profit2 <= EPSILON:
-            decision = "Do nothing"
-            executed = []
-            total = 0.0
+    # Segment 2*slot is base->other, 2*slot+1 is other->base; txs between two non-base
+    # assets (or self-swaps) get no segment
+    n_tokens = max(len(tokens), 1)
+    token_ids = {t: i for i, t in enumerate(tokens)}
+    pair_codes, pair_segments = [], []
+    for (base, other), slot in slots.items():
+        if base in token_ids:
+            b, o = token_ids[base], token_ids[other]
+            pair_codes += [b * n_tokens + o, o * n_tokens + b]
+            pair_segments += [2 * slot, 2 * slot + 1]
+    pair_codes = np.array(pair_codes, dtype=np.int64)
+    by_code = np.argsort(pair_codes)
+    pair_codes, pair_segments = pair_codes[by_code], np.array(pair_segments, dtype=np.int64)[by_code]
+    codes = src * n_tokens + dst
+    segment = np.full(len(codes), -1, dtype=np.int64)
+    if len(pair_codes):
+        pos = np.minimum(np.searchsorted(pair_codes, codes), len(pair_codes) - 1)
+        hit = pair_codes[pos] == codes
+        segment[hit] = pair_segments[pos[hit]]
 
-        elif profit1 >= profit2 and profit1 > EPSILON:
-            decision = f"Execute {base_asset}->{j} and mediator ({j}->{base_asset})"
-            executed = fwd[: k1 + 1]
-            total = profit1
+    # Same test as exo.get(token, 0) <= 0 on either side
+    prices = np.array([exo.get(t, 0) for t in tokens], dtype=np.float64)
+    valid = ~(prices[src] <= 0) & ~(prices[dst] <= 0)
+    in_pair = segment >= 0
+    kept = np.flatnonzero(in_pair & valid)
+    skipped = {}
+    if verbose:
+        for i in np.flatnonzero(in_pair & ~valid).tolist():
+            skipped.setdefault(int(segment[i]), []).append(row(i))
 
-            # Insert mediator batch
-            total_qty = sum(tx.q for tx in executed)
-            avg_rate = sum(tx.r * tx.q for tx in executed) / max(total_qty, 1e-12)
-            mediator = Transaction(j, base_asset, total_qty, 1 / avg_rate)
-            executed.append(mediator)
+    # Profit of every tx at once, same arithmetic as helper
+    profits = q[kept] * (prices[src[kept]] - prices[dst[kept]] * r[kept])
 
-        elif profit2 > EPSILON:
-            decision = f"Execute {j}->{base_asset} and mediator ({base_asset}->{j})"
-            executed = rev[: k2 + 1]
-            total = profit2
+    # lexsort is stable, so equal rates keep batch order like list.sort
+    segments = segment[kept]
+    order = np.lexsort((r[kept], segments))
+    sorted_segments = segments[order]
+    bounds = np.flatnonzero(np.diff(sorted_segments)) + 1
+    starts = np.concatenate(([0], bounds)).astype(np.int64) if len(order) else []
+    ends = np.concatenate((bounds, [len(order)])).astype(np.int64) if len(order) else []
+
+    # segment -> (batch indices in r order, argmax index, best cumulative profit)
+    best = {}
+    for start, end in zip(list(starts), list(ends)):
+        seg_order = order[start:end]
+        running = np.cumsum(profits[seg_order])
+        if np.isnan(running).any():
+            # argmax treats NaN as the maximum; keep the scalar semantics
+            k, value = cumulative_argmax(profits[seg_order].tolist())
+        else:
+            # First index of the maximum == first strict improvement in the scan
+            k = int(np.argmax(running))
+            value = float(running[k])
+        best[int(sorted_segments[start])] = (kept[seg_order], k, value)
 
-            # Insert mediator batch
-            total_qty = sum(tx.q for tx in executed)
-            avg_rate = sum(tx.r * tx.q for tx in executed) / max(total_qty, 1e-12)
-            mediator = Transaction(base_asset, j, total_qty, 1 / avg_rate)
-            executed.append(mediator)
+    if reserves is not None and len(order):
+        _apply_price_impact(best, reserves, exo, slots, q, r, kept, order, sorted_segments, starts, ends)
+
+    empty = (np.array([], dtype=np.int64), -1, float('-inf'))
+    for (base_asset, j), i in slots.items():
+        if verbose:
+            print(f"Pair ({base_asset}, {j})")
+            for tx in skipped.get(2 * i, []) + skipped.get(2 * i + 1, []):
+                _skip(tx, exo)
+        fwd, k1, profit1 = best.get(2 * i, empty)
+        rev, k2, profit2 = best.get(2 * i + 1, empty)
+
+        decision, direction = _decide(base_asset, j, profit1, profit2)
+        if direction == 0:
+            executed = _mediated([row(i) for i in fwd[: k1 + 1].tolist()], j, base_asset)
+            total = profit1
+        elif direction == 1:
+            executed = _mediated([row(i) for i in rev[: k2 + 1].tolist()], base_asset, j)
+            total = profit2
         else:
-            decision = "Do nothing"
             executed = []
             total = 0.0
 
-        print(f"PROFIT1={profit1:.4f}, PROFIT2={profit2:.4f}")
-        print(f"Decision: {decision}")
-        print(f"Executed transactions: {executed}")
-        print("")
+        if verbose:
+            print(f"PROFIT1={profit1:.4f}, PROFIT2={profit2:.4f}")
+            print(f"Decision: {decision}")
+            print(f"Executed transactions: {executed}")
+            print("")
 
         results[(base_asset, j)] = {
             "decision": decision,
@@ -105,6 +248,208 @@ def compute_batch(batch, exo, base_asset="A"):
     return results
 
 
+# Incremental optimizer for a live pending pool.
+# Each (src, dst) direction keeps its txs in a treap ordered by (r, arrival), where every
+# node also carries the count, sum of q and sum of q*r of its subtree. With q > 0 a tx's
+# profit q * (exo[src] - exo[dst] * r) is positive exactly when r < exo[src] / exo[dst],
+# so the best prefix in r order is "every tx below that rate": one O(log n) descent gives
+# its size and, from the two sums, its profit exo[src] * sum(q) - exo[dst] * sum(q*r).
+# Sums don't depend on prices, so a price update is O(1) and the next query sees it.
+# Decisions match compute_batch on the same pool up to floating-point rounding.
+
+class _Node:
+    __slots__ = ("key", "tx", "priority", "left", "right", "count", "sum_q", "sum_qr")
+
+    def __init__(self, key, tx):
+        self.key = key
+        self.tx = tx
+        self.priority = random.random()
+        self.left = self.right = None
+        self.count, self.sum_q, self.sum_qr = 1, tx.q, tx.q * tx.r
+
+
+def _update(node):
+    node.count, node.sum_q, node.sum_qr = 1, node.tx.q, node.tx.q * node.tx.r
+    for child in (node.left, node.right):
+        if child is not None:
+            node.count += child.count
+            node.sum_q += child.sum_q
+            node.sum_qr += child.sum_qr
+    return node
+
+
+def _split(node, key):
+    # (keys < key, keys >= key)
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        return _update(node), right
+    left, node.left = _split(node.left, key)
+    return left, _update(node)
+
+
+def _merge(left, right):
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _profitable_prefix(node, src_price, dst_price):
+    # (count, sum q, sum q*r) of the txs with a positive profit, a prefix in r order
+    count, sum_q, sum_qr = 0, 0.0, 0.0
+    while node is not None:
+        if src_price - dst_price * node.tx.r > 0:
+            if node.left is not None:
+                count += node.left.count
+                sum_q += node.left.sum_q
+                sum_qr += node.left.sum_qr
+            count += 1
+            sum_q += node.tx.q
+            sum_qr += node.tx.q * node.tx.r
+            node = node.right
+        else:
+            node = node.left
+    return count, sum_q, sum_qr
+
+
+def _first(node, k):
+    # First k txs in key order
+    txs, stack = [], []
+    while len(txs) < k and (stack or node is not None):
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        txs.append(node.tx)
+        node = node.right
+    return txs
+
+
+class IncrementalOptimizer:
+    """compute_batch_multi kept current as txs arrive and leave and prices move."""
+
+    def __init__(self, exo, base_assets=("A",)):
+        self.exo = dict(exo)
+        self.base_assets = list(dict.fromkeys(base_assets))
+        # (src, dst) -> treap root
+        self._trees = {}
+        # tx hash -> ((src, dst), treap key or None when the tx belongs to no pair)
+        self._txs = {}
+        # token -> txs touching it (an asset is listed while any tx touches it)
+        self._assets = {}
+        # pair -> txs in it, and token -> pairs holding txs
+        self._pair_txs = {}
+        self._token_pairs = {}
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._txs)
+
+    def pair_of(self, src, dst):
+        """(base, other) pair a src->dst tx belongs to, or None (same rule as compute_batch_multi)."""
+        if src == dst:
+            return None
+        for base in self.base_assets:
+            if base in (src, dst):
+                return (base, dst if base == src else src)
+        return None
+
+    def add(self, tx, tx_hash=None):
+        """Adds (or replaces) a pending tx; returns the pair whose result may have changed."""
+        tx_hash = tx.tx_hash if tx_hash is None else tx_hash
+        if tx_hash is None:
+            raise ValueError("Transaction has no tx_hash")
+        if not (tx.q > 0 and tx.r > 0):
+            raise ValueError(f"Transaction needs q > 0 and r > 0, got q={tx.q} r={tx.r}")
+        self.remove(tx_hash)
+
+        segment = (tx.src, tx.dst)
+        pair = self.pair_of(*segment)
+        key = None
+        if pair is not None:
+            key = (tx.r, self._seq)
+            self._seq += 1
+            left, right = _split(self._trees.get(segment), key)
+            self._trees[segment] = _merge(_merge(left, _Node(key, tx)), right)
+            self._pair_txs[pair] = self._pair_txs.get(pair, 0) + 1
+            if self._pair_txs[pair] == 1:
+                for token in pair:
+                    self._token_pairs.setdefault(token, set()).add(pair)
+        for token in segment:
+            self._assets[token] = self._assets.get(token, 0) + 1
+        self._txs[tx_hash] = (segment, key)
+        return pair
+
+    def remove(self, tx_hash):
+        """Drops a tx (mined, replaced or evicted); returns its pair, None if unknown or unpaired."""
+        entry = self._txs.pop(tx_hash, None)
+        if entry is None:
+            return None
+        segment, key = entry
+        for token in segment:
+            self._assets[token] -= 1
+            if not self._assets[token]:
+                del self._assets[token]
+        if key is None:
+            return None
+
+        # Keys are unique, so (r, seq + 1) splits off exactly this node
+        left, rest = _split(self._trees[segment], key)
+        _, right = _split(rest, (key[0], key[1] + 1))
+        root = _merge(left, right)
+        if root is None:
+            del self._trees[segment]
+        else:
+            self._trees[segment] = root
+        pair = self.pair_of(*segment)
+        self._pair_txs[pair] -= 1
+        if not self._pair_txs[pair]:
+            del self._pair_txs[pair]
+            for token in pair:
+                self._token_pairs[token].discard(pair)
+        return pair
+
+    def update_price(self, token, usd):
+        """Sets the exogenous price of `token`; returns the pairs whose result may have changed."""
+        self.exo[token] = usd
+        return sorted(self._token_pairs.get(token, ()))
+
+    def _side(self, src, dst):
+        # (txs in the best prefix, its profit) for one direction
+        root = self._trees.get((src, dst))
+        src_price, dst_price = self.exo.get(src, 0), self.exo.get(dst, 0)
+        if root is None or src_price <= 0 or dst_price <= 0:
+            return 0, float('-inf')
+        count, sum_q, sum_qr = _profitable_prefix(root, src_price, dst_price)
+        return count, src_price * sum_q - dst_price * sum_qr
+
+    def best(self, pair):
+        """Current decision, profit and executed txs (plus mediator) for (base, other)."""
+        base_asset, j = pair
+        k1, profit1 = self._side(base_asset, j)
+        k2, profit2 = self._side(j, base_asset)
+        decision, direction = _decide(base_asset, j, profit1, profit2)
+        if direction == 0:
+            executed = _mediated(_first(self._trees[(base_asset, j)], k1), j, base_asset)
+            total = profit1
+        elif direction == 1:
+            executed = _mediated(_first(self._trees[(j, base_asset)], k2), base_asset, j)
+            total = profit2
+        else:
+            executed = []
+            total = 0.0
+        return {"decision": decision, "profit": total, "executed": executed}
+
+    def results(self):
+        """Every pair, as compute_batch_multi(pool, exo, base_assets, verbose=False) returns them."""
+        return {pair: self.best(pair) for pair in _pair_slots(sorted(self._assets), self.base_assets)}
+
+
 if __name__ == "__main__":
     # example test case presented in paper
     example_batch = [
@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Multicall3 is deployed at the same address on mainnet and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# aggregate3((address target, bool allowFailure, bytes callData)[])
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+
+# Sub-calls per eth_call; keeps each request well under provider gas/size limits
+DEFAULT_CHUNK_SIZE = 500
+
+# Chunks in flight at once
+DEFAULT_CONCURRENCY = 4
+
+# Round trips made through this module, for reporting
+RPC_STATS = {"eth_call": 0}
+_stats_lock = threading.Lock()
+
+
+def _eth_call(w3, to, data, block_identifier):
+    with _stats_lock:
+        RPC_STATS["eth_call"] += 1
+    return bytes(w3.eth.call({"to": to, "data": "0x" + data.hex()}, block_identifier))
+
+
+def _reverted(error):
+    # A call the node executed and that reverted, as opposed to a transport or node failure
+    from web3.exceptions import ContractLogicError
+
+    return isinstance(error, ContractLogicError)
+
+
+def _run_chunk(w3, chunk, block_identifier):
+    from eth_abi import decode, encode
+    from eth_abi.exceptions import DecodingError
+
+    payload = AGGREGATE3_SELECTOR + encode(
+        ["(address,bool,bytes)[]"],
+        [[(target, True, data) for target, data in chunk]],
+    )
+    try:
+        raw = _eth_call(w3, MULTICALL3_ADDRESS, payload, block_identifier)
+        (decoded,) = decode(["(bool,bytes)[]"], raw)
+        return [(ok, bytes(data)) for ok, data in decoded]
+    except Exception as e:
+        # Only a reverted or undecodable aggregate3 (e.g. no Multicall3 on the chain) falls back
+        if not (_reverted(e) or isinstance(e, DecodingError)):
+            raise
+        print(f"Multicall chunk failed ({type(e).__name__}: {e}), falling back to single calls")
+    results = []
+    for target, data in chunk:
+        try:
+            results.append((True, _eth_call(w3, target, data, block_identifier)))
+        except Exception as e:
+            if not _reverted(e):
+                raise
+            results.append((False, b""))
+    return results
+
+
+def aggregate3(w3, calls, chunk_size=DEFAULT_CHUNK_SIZE, block_identifier="latest", concurrency=DEFAULT_CONCURRENCY):
+    """Runs (target, calldata) calls through Multicall3, returning (success, returndata) per call.
+
+    Individual reverts are reported as (False, b"") instead of failing the batch. If a whole
+    chunk reverts or returns nothing decodable (e.g. no Multicall3 on the chain), its calls
+    are retried one eth_call each. Transport and node errors (timeouts, refused connections,
+    RpcPoolError) propagate, so an outage is never mistaken for a revert.
+    Chunks are sent `concurrency` at a time; results keep the order of `calls`.
+    """
+    chunks = [calls[i:i + chunk_size] for i in range(0, len(calls), chunk_size)]
+    if len(chunks) <= 1 or concurrency <= 1:
+        chunk_results = [_run_chunk(w3, chunk, block_identifier) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as pool:
+            chunk_results = list(pool.map(lambda c: _run_chunk(w3, c, block_identifier), chunks))
+    return [r for results in chunk_results for r in results]
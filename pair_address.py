@@ -0,0 +1,71 @@
+import os
+
+# Offline Uniswap V2 pair addresses.
+# Pairs are deployed with CREATE2 from the factory, salted with keccak(token0 ++ token1),
+# so the address of any pair is known without asking the factory. Sorting the two tokens
+# also gives token0/token1, which is what getReserves is ordered by. Whether the pair has
+# actually been deployed is only learned when its reserves are read (no code -> no data).
+
+UNISWAP_V2_FACTORY = "0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f"
+UNISWAP_V2_INIT_CODE_HASH = "0x96e8ac4277198ff8b6f785478aa9a39f403cb768dd02cbee326c3e7da348845f"
+
+# Forks only differ by factory and init code hash, which only make sense together:
+# a deployment is always the (factory, init code hash) pair
+DEXES = {
+    "uniswap_v2": (UNISWAP_V2_FACTORY, UNISWAP_V2_INIT_CODE_HASH),
+}
+
+
+def dex_from_env():
+    """(factory, init code hash) from PAIR_FACTORY + PAIR_INIT_CODE_HASH, or PAIR_DEX by name."""
+    factory, init_code_hash = os.getenv("PAIR_FACTORY"), os.getenv("PAIR_INIT_CODE_HASH")
+    if factory or init_code_hash:
+        if not (factory and init_code_hash):
+            raise ValueError("PAIR_FACTORY and PAIR_INIT_CODE_HASH must be set together")
+        return factory, init_code_hash
+    name = os.getenv("PAIR_DEX", "uniswap_v2")
+    if name not in DEXES:
+        raise ValueError(f"Unknown PAIR_DEX {name!r}, expected one of {sorted(DEXES)}")
+    return DEXES[name]
+
+
+# Deployment used when none is passed
+DEX = dex_from_env()
+
+# (factory, init code hash, token0, token1) -> pair address
+_memo = {}
+
+
+def _raw(addr):
+    raw = bytes.fromhex(addr[2:] if addr[:2] in ("0x", "0X") else addr)
+    if len(raw) != 20:
+        raise ValueError(f"Not an address: {addr}")
+    return raw
+
+
+def sort_tokens(token_a, token_b):
+    """Returns (token0, token1) as lowercase addresses, ordered like the pair contract."""
+    a, b = token_a.lower(), token_b.lower()
+    if _raw(a) == _raw(b):
+        raise ValueError(f"Identical tokens: {token_a}")
+    return (a, b) if _raw(a) < _raw(b) else (b, a)
+
+
+def pair_for(token_a, token_b, dex=DEX):
+    """Checksum address of the token_a/token_b pair of `dex` (factory, init code hash), deployed or not."""
+    factory, init_code_hash = dex
+    token0, token1 = sort_tokens(token_a, token_b)
+    key = (factory.lower(), init_code_hash.lower(), token0, token1)
+    if key not in _memo:
+        from eth_utils import keccak, to_checksum_address
+
+        salt = keccak(_raw(token0) + _raw(token1))
+        digest = keccak(b"\xff" + _raw(factory) + salt + bytes.fromhex(init_code_hash[2:]))
+        _memo[key] = to_checksum_address(digest[12:])
+    return _memo[key]
+
+
+if __name__ == "__main__":
+    WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+    USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+    print(f"WETH/USDC pair: {pair_for(WETH, USDC)}")
@@ -0,0 +1,107 @@
+import heapq
+
+# Multi-hop USD pricing over a Uniswap V2 liquidity graph.
+# Tokens are nodes and pairs with non-zero reserves are edges. Starting from the USD
+# anchor (USDC = 1), every token gets the price along its widest path, i.e. the path
+# whose shallowest pool holds the most USD, so thin pools never decide a price when a
+# deeper route exists. The graph is solved once and prices are then plain dict lookups.
+
+USDC = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+USDT = "0xdac17f958d2ee523a2206206994597c13d831ec7"
+DAI = "0x6b175474e89094c44da98b954eedeac495271d0f"
+WETH = "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
+
+# Tokens every other token is paired against when building the graph
+HUBS = (WETH, USDC, USDT, DAI)
+
+
+class PriceGraph:
+    """USD prices for every token reachable from `anchor` through pairs in `reserves`."""
+
+    def __init__(self, reserves, decimals, anchor=USDC, anchor_price=1.0, min_liquidity_usd=0.0):
+        """`reserves` maps (token_a, token_b) -> (reserve_a, reserve_b); `decimals` maps token -> int."""
+        self.anchor = anchor.lower()
+        self.adjacency = {}
+        for (a, b), (reserve_a, reserve_b) in reserves.items():
+            if not reserve_a or not reserve_b:
+                continue
+            a, b = a.lower(), b.lower()
+            self.adjacency.setdefault(a, []).append((b, reserve_a, reserve_b))
+            self.adjacency.setdefault(b, []).append((a, reserve_b, reserve_a))
+        # token -> USD price, USD depth of the shallowest pool on its path, previous hop
+        self.prices = {}
+        self.depth = {}
+        self.via = {}
+        self._solve(decimals, anchor_price, min_liquidity_usd)
+
+    def _solve(self, decimals, anchor_price, min_liquidity_usd):
+        # Widest-path Dijkstra: a token's price is final once it is popped, since no later
+        # path can have a deeper bottleneck.
+        best = {self.anchor: (float("inf"), anchor_price, None)}
+        heap = [(-float("inf"), 0, self.anchor)]
+        counter = 1
+        while heap:
+            _, _, u = heapq.heappop(heap)
+            if u in self.prices:
+                continue
+            depth_u, price_u, via_u = best[u]
+            self.prices[u], self.depth[u], self.via[u] = price_u, depth_u, via_u
+            scale_u = 10 ** decimals.get(u, 18)
+            for v, reserve_u, reserve_v in self.adjacency.get(u, ()):
+                if v in self.prices:
+                    continue
+                # USD held on the already-priced side of the pool
+                edge_usd = reserve_u / scale_u * price_u
+                if edge_usd < min_liquidity_usd:
+                    continue
+                depth = min(depth_u, edge_usd)
+                if v not in best or depth > best[v][0]:
+                    price_v = price_u * (reserve_u / scale_u) / (reserve_v / (10 ** decimals.get(v, 18)))
+                    best[v] = (depth, price_v, u)
+                    heapq.heappush(heap, (-depth, counter, v))
+                    counter += 1
+
+    def price(self, token):
+        """USD price of `token`, or None when no pool connects it to the anchor."""
+        return self.prices.get(token.lower())
+
+    def path(self, token):
+        """Tokens from the anchor to `token` along the pricing path."""
+        token = token.lower()
+        if token not in self.prices:
+            return None
+        path = [token]
+        while self.via[path[-1]] is not None:
+            path.append(self.via[path[-1]])
+        return path[::-1]
+
+    def __contains__(self, token):
+        return token.lower() in self.prices
+
+
+def candidate_pairs(tokens, hubs=HUBS):
+    """Every token against every hub, plus the hubs among themselves."""
+    hubs = [h.lower() for h in hubs]
+    pairs = []
+    for i, a in enumerate(hubs):
+        pairs += [(a, b) for b in hubs[i + 1:]]
+    for token in dict.fromkeys(t.lower() for t in tokens):
+        if token not in hubs:
+            pairs += [(token, h) for h in hubs]
+    return pairs
+
+
+if __name__ == "__main__":
+    # Toy graph: X only trades against DAI; Y has a thin direct USDC pool and a deep WETH pool
+    X, Y = "0x" + "11" * 20, "0x" + "22" * 20
+    decimals = {USDC: 6, DAI: 18, WETH: 18, X: 18, Y: 18}
+    reserves = {
+        (WETH, USDC): (1000 * 10**18, 3_000_000 * 10**6),
+        (DAI, USDC): (5_000_000 * 10**18, 5_000_000 * 10**6),
+        (X, DAI): (100 * 10**18, 200 * 10**18),
+        (Y, USDC): (1 * 10**18, 10 * 10**6),
+        (Y, WETH): (30_000 * 10**18, 20 * 10**18),
+    }
+    graph = PriceGraph(reserves, decimals)
+    for token in (WETH, X, Y):
+        print(f"{token}: {graph.price(token):.4f} USD via {graph.path(token)}")
@@ -0,0 +1,56 @@
+# Block-pinned Uniswap V2 reserve cache.
+# Reserves only change between blocks, so a (pair, block number) entry never goes stale;
+# re-pricing the same pairs within a block is served from memory. Only the most recent
+# blocks are kept, and reads against a tag like "latest" are never cached since the
+# block they resolved to is unknown.
+
+# Blocks kept in memory (older ones are dropped as new blocks come in)
+KEEP_BLOCKS = 8
+
+
+class ReserveCache:
+    """(pair address, block number) -> (reserve0, reserve1), or None for a pair with no code."""
+
+    def __init__(self, keep_blocks=KEEP_BLOCKS):
+        self.keep_blocks = keep_blocks
+        # block number -> {lowercase pair address: reserves}
+        self._blocks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, block_number, pairs):
+        """Returns {pair: reserves} for the pairs cached at `block_number`."""
+        pairs = list(pairs)
+        entries = self._blocks.get(block_number) if isinstance(block_number, int) else None
+        found = {}
+        if entries:
+            for pair in pairs:
+                key = pair.lower()
+                if key in entries:
+                    found[pair] = entries[key]
+        self.hits += len(found)
+        self.misses += len(pairs) - len(found)
+        return found
+
+    def put_many(self, block_number, reserves):
+        """Stores {pair: reserves} read at `block_number`; ignored for non-numeric tags."""
+        if not isinstance(block_number, int):
+            return
+        if block_number not in self._blocks:
+            self._blocks[block_number] = {}
+            # Invalidate by block number: keep only the newest `keep_blocks`
+            for old in sorted(self._blocks)[:-self.keep_blocks]:
+                del self._blocks[old]
+        entries = self._blocks.get(block_number)
+        if entries is None:
+            # Older than everything kept
+            return
+        for pair, value in reserves.items():
+            entries[pair.lower()] = value
+
+    def block(self, block_number):
+        """Every {pair: reserves} cached at `block_number` (empty if the block isn't kept)."""
+        return dict(self._blocks.get(block_number, {}))
+
+    def clear(self):
+        self._blocks.clear()
@@ -0,0 +1,195 @@
+import json
+from multicall import aggregate3
+
+# Incremental Uniswap V2 reserve tracking.
+# Reserves are read once with getReserves, then kept current by applying the
+# Sync(uint112,uint112) events pairs emit on every reserve change, fetched with
+# eth_getLogs over the blocks since the last poll. The cost per poll depends on how
+# much the tracked pairs traded, not on how many there are. Every change is journaled
+# per block and block hashes are checkpointed, so a reorg rolls the reserves back to
+# the newest checkpoint still on the canonical chain and the blocks after it are re-read.
+
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+GET_RESERVES_CALL = bytes.fromhex("0902f1ac")  # getReserves()
+
+# Blocks of history kept for rollback; a reorg deeper than this reseeds
+CHECKPOINT_DEPTH = 64
+# Blocks per eth_getLogs request
+MAX_BLOCK_RANGE = 1000
+# Above this many pairs, fetch every Sync log and filter locally instead of listing addresses
+ADDRESS_FILTER_LIMIT = 100
+
+
+def _to_int(x):
+    return x if isinstance(x, int) else int(x, 16)
+
+
+def _to_bytes(x):
+    return bytes.fromhex(x[2:]) if isinstance(x, str) else bytes(x)
+
+
+def _to_hex(x):
+    return x.lower() if isinstance(x, str) else "0x" + bytes(x).hex()
+
+
+def normalize_log(log):
+    """Plain-JSON view of a log (web3 AttributeDict/HexBytes or raw RPC dict)."""
+    return {
+        "address": log["address"].lower(),
+        "blockNumber": _to_int(log["blockNumber"]),
+        "blockHash": _to_hex(log["blockHash"]),
+        "logIndex": _to_int(log["logIndex"]),
+        "topics": [_to_hex(t) for t in log["topics"]],
+        "data": _to_hex(log["data"]),
+    }
+
+
+def load_logs(path):
+    """Logs recorded by a tracker created with `log_path`."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReserveTracker:
+    """Reserves of `pairs` as of `self.block`, kept current from Sync logs."""
+
+    def __init__(self, pairs, client=None, checkpoint_depth=CHECKPOINT_DEPTH, log_path=None):
+        self.client = client
+        self.pairs = list(dict.fromkeys(p.lower() for p in pairs))
+        self._tracked = set(self.pairs)
+        self.checkpoint_depth = checkpoint_depth
+        self.log_path = log_path
+        # pair -> (reserve0, reserve1), None while the pair has no code
+        self.reserves = {}
+        self.block = None
+        # block number -> block hash, for blocks we built state on
+        self.hashes = {}
+        # block number -> {pair: reserves before that block}
+        self._journal = {}
+        self.stats = {"logs": 0, "polls": 0, "reorgs": 0, "reseeds": 0}
+
+    def seed(self, block_number, block_hash=None, reserves=None):
+        """Starts from a full read at `block_number` (or the given `reserves`, e.g. recorded)."""
+        if reserves is None:
+            results = aggregate3(self.client, [(p, GET_RESERVES_CALL) for p in self.pairs],
+                                 block_identifier=block_number)
+            reserves = {}
+            for pair, (ok, raw) in zip(self.pairs, results):
+                ok = ok and len(raw) >= 64
+                reserves[pair] = (int.from_bytes(raw[:32], "big"), int.from_bytes(raw[32:64], "big")) if ok else None
+        self.reserves = {p.lower(): r for p, r in reserves.items()}
+        self.block = block_number
+        self.hashes = {}
+        self._journal = {}
+        if block_hash is None and self.client is not None:
+            block_hash = self._block_hash(block_number)
+        if block_hash is not None:
+            self.hashes[block_number] = _to_hex(block_hash)
+
+    def apply_logs(self, logs, to_block=None):
+        """Applies Sync logs in chain order and advances to `to_block`; returns how many applied."""
+        logs = sorted((normalize_log(log) for log in logs), key=lambda l: (l["blockNumber"], l["logIndex"]))
+        applied = 0
+        for log in logs:
+            number = log["blockNumber"]
+            if number <= self.block or log["address"] not in self._tracked:
+                continue
+            if not log["topics"] or log["topics"][0] != SYNC_TOPIC:
+                continue
+            data = _to_bytes(log["data"])
+            pair = log["address"]
+            journal = self._journal.setdefault(number, {})
+            if pair not in journal:
+                journal[pair] = self.reserves.get(pair)
+            self.reserves[pair] = (int.from_bytes(data[:32], "big"), int.from_bytes(data[32:64], "big"))
+            self.hashes[number] = log["blockHash"]
+            applied += 1
+        last = max([self.block, to_block or 0] + [l["blockNumber"] for l in logs])
+        self.block = last
+        self._prune()
+        self.stats["logs"] += applied
+        return applied
+
+    def rollback(self, block_number):
+        """Undoes every change made after `block_number`."""
+        for number in sorted(self._journal, reverse=True):
+            if number <= block_number:
+                break
+            for pair, previous in self._journal.pop(number).items():
+                self.reserves[pair] = previous
+        self.hashes = {n: h for n, h in self.hashes.items() if n <= block_number}
+        self.block = block_number
+
+    def _prune(self):
+        horizon = self.block - self.checkpoint_depth
+        for number in [n for n in self._journal if n < horizon]:
+            del self._journal[number]
+        # Checkpoints older than the journal can't be rolled back to
+        for number in [n for n in self.hashes if n < horizon]:
+            del self.hashes[number]
+
+    def _block_hash(self, number):
+        return _to_hex(self.client.eth.get_block(number)["hash"])
+
+    def _common_ancestor(self, head):
+        # Newest checkpoint whose hash is still canonical
+        for number in sorted(self.hashes, reverse=True):
+            if number <= head and self._block_hash(number) == self.hashes[number]:
+                return number
+        return None
+
+    def _get_logs(self, start, end):
+        from web3 import Web3
+
+        params = {"fromBlock": start, "toBlock": end, "topics": [SYNC_TOPIC]}
+        if len(self.pairs) <= ADDRESS_FILTER_LIMIT:
+            params["address"] = [Web3.to_checksum_address(p) for p in self.pairs]
+        logs = [normalize_log(log) for log in self.client.eth.get_logs(params)]
+        if self.log_path:
+            with open(self.log_path, "a") as f:
+                for log in logs:
+                    if log["address"] in self._tracked:
+                        f.write(json.dumps(log) + "\n")
+        return logs
+
+    def poll(self):
+        """Brings reserves up to the current head; returns the number of Sync logs applied."""
+        # Head number and hash from one header, taken before the logs: if the chain reorgs
+        # while they are fetched, the next poll sees the hash change and rolls back.
+        head_block = self.client.eth.get_block("latest")
+        head, head_hash = head_block["number"], _to_hex(head_block["hash"])
+        self.stats["polls"] += 1
+        if self.block is None:
+            self.seed(head, head_hash)
+            return 0
+
+        # The fork may also be shorter than what we have already applied
+        if self.block > head or (self.block in self.hashes and self._block_hash(self.block) != self.hashes[self.block]):
+            self.stats["reorgs"] += 1
+            ancestor = self._common_ancestor(head)
+            if ancestor is None:
+                print(f"Reorg deeper than {self.checkpoint_depth} blocks, reseeding at {head}")
+                self.stats["reseeds"] += 1
+                self.seed(head, head_hash)
+                return 0
+            print(f"Reorg detected, rolling back from block {self.block} to {ancestor}")
+            self.rollback(ancestor)
+
+        applied = 0
+        for start in range(self.block + 1, head + 1, MAX_BLOCK_RANGE):
+            end = min(start + MAX_BLOCK_RANGE - 1, head)
+            applied += self.apply_logs(self._get_logs(start, end), to_block=end)
+        if self.block == head:
+            self.hashes.setdefault(head, head_hash)
+        return applied
+
+    def publish(self, cache=None):
+        """Stores the current reserves in the block-pinned cache `token_pricing` reads from.
+
+        `build_exo_price_map(..., block_number=tracker.block)` then needs no getReserves
+        for tracked pairs.
+        """
+        if cache is None:
+            from token_pricing import reserve_cache as cache
+        cache.put_many(self.block, self.reserves)
+
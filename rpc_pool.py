@@ -0,0 +1,269 @@
+import json
+import os
+import threading
+import time
+
+# Shared JSON-RPC client layer.
+# Every endpoint keeps one keep-alive requests.Session. Requests go to the healthy
+# endpoint with the lowest recent latency, and a rate limit (HTTP 429 or a JSON-RPC
+# rate-limit error), a 5xx or a connection error puts that endpoint on a short cooldown
+# and retries on the next one. An optional background thread probes every endpoint with
+# eth_blockNumber to keep latencies fresh and to sideline endpoints that fall behind.
+
+DEFAULT_TIMEOUT = 20.0
+# Attempts per request, across endpoints
+DEFAULT_RETRIES = 3
+# Seconds between health probes
+DEFAULT_PROBE_INTERVAL = 15.0
+# Cooldowns after a failure; a 429 with Retry-After uses that instead
+RATE_LIMIT_COOLDOWN = 1.0
+ERROR_COOLDOWN = 5.0
+# Longest server-requested Retry-After honoured, in seconds
+MAX_RETRY_AFTER = 30.0
+# Weight of the newest sample in the latency moving average
+LATENCY_ALPHA = 0.3
+# An endpoint this many blocks behind the best one is treated as unhealthy
+MAX_BLOCK_LAG = 3
+# JSON-RPC error codes providers use for rate limiting
+RATE_LIMIT_CODES = {-32005, -32029, 429}
+
+
+class RpcPoolError(Exception):
+    """Every attempt failed; the last underlying error is chained."""
+
+
+class Endpoint:
+    """One RPC URL with its session, health and counters."""
+
+    def __init__(self, url, pool_size=16):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.session = requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Moving average in seconds; None until the first response
+        self.latency = None
+        self.down_until = 0.0
+        self.block_number = None
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "failovers": 0}
+
+    def healthy(self, now=None):
+        return (time.monotonic() if now is None else now) >= self.down_until
+
+    def record_latency(self, seconds):
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_ALPHA * (seconds - self.latency)
+
+    def snapshot(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy(),
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "block_number": self.block_number,
+            **self.stats,
+        }
+
+
+def _rate_limit_error(body):
+    # Small error bodies only; large results are never errors
+    if len(body) > 4096 or b'"error"' not in body:
+        return False
+    try:
+        error = json.loads(body).get("error") or {}
+    except (ValueError, AttributeError):
+        return False
+    return error.get("code") in RATE_LIMIT_CODES or "rate limit" in str(error.get("message", "")).lower()
+
+
+class RpcPool:
+    """Latency-routed, failing-over JSON-RPC client over several endpoints."""
+
+    def __init__(self, urls, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, probe_interval=DEFAULT_PROBE_INTERVAL):
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            raise RuntimeError("No RPC endpoints configured. Set RPC_URLS, QUICKNODE_ENDPOINT or INFURA_URL.")
+        self.endpoints = [Endpoint(u) for u in urls]
+        self.timeout = timeout
+        self.retries = retries
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._id = 0
+        self._prober = None
+        self._stop = threading.Event()
+
+    def ranked(self):
+        """Endpoints in routing order: healthy by latency (untried first), then by recovery time."""
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if e.healthy(now)]
+        healthy.sort(key=lambda e: -1.0 if e.latency is None else e.latency)
+        down = sorted((e for e in self.endpoints if not e.healthy(now)), key=lambda e: e.down_until)
+        return healthy + down
+
+    def _mark_down(self, endpoint, seconds):
+        with self._lock:
+            endpoint.down_until = max(endpoint.down_until, time.monotonic() + seconds)
+
+    def post(self, body, timeout=None, retries=None, retry_read_timeout=True):
+        """Sends an encoded JSON-RPC request; returns the raw response body.
+
+        `timeout` and `retries` override the pool defaults for this call. With
+        retry_read_timeout=False a response that doesn't finish within `timeout` ends the
+        call instead of starting over on the next endpoint (e.g. a long txpool_content
+        download); rate limits, 5xx and connection errors still fail over.
+        """
+        import requests
+
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        last_error = None
+        for attempt in range(retries):
+            # Failed endpoints are cooling down, so this is the next best one
+            endpoint = self.ranked()[0]
+            if attempt:
+                with self._lock:
+                    endpoint.stats["failovers"] += 1
+            if not endpoint.healthy():
+                # Everything is cooling down; wait for the first endpoint to come back
+                time.sleep(max(endpoint.down_until - time.monotonic(), 0))
+            started = time.monotonic()
+            with self._lock:
+                endpoint.stats["requests"] += 1
+            try:
+                resp = endpoint.session.post(endpoint.url, data=body, timeout=timeout)
+            except requests.RequestException as e:
+                last_error = e
+                with self._lock:
+                    endpoint.stats["errors"] += 1
+                self._mark_down(endpoint, ERROR_COOLDOWN)
+                # A connect timeout is a connection error; only a slow response gives up
+                if not retry_read_timeout and isinstance(e, requests.ReadTimeout):
+                    raise RpcPoolError(f"{endpoint.url} timed out after {timeout}s") from e
+                continue
+            elapsed = time.monotonic() - started
+
+            if resp.status_code == 429 or (resp.ok and _rate_limit_error(resp.content)):
+                last_error = RpcPoolError(f"{endpoint.url} rate limited")
+                with self._lock:
+                    endpoint.stats["rate_limited"] += 1
+                retry_after = resp.headers.get("Retry-After", "")
+                cooldown = min(float(retry_after), MAX_RETRY_AFTER) if retry_after.isdigit() else RATE_LIMIT_COOLDOWN
+                self._mark_down(endpoint, cooldown)
+                continue
+            if resp.status_code >= 500:
+                last_error = RpcPoolError(f"{endpoint.url} returned HTTP {resp.status_code}")
+                with self._lock:
+                    endpoint.stats["errors"] += 1
+                self._mark_down(endpoint, ERROR_COOLDOWN)
+                continue
+            resp.raise_for_status()
+            with self._lock:
+                endpoint.record_latency(elapsed)
+            return resp.content
+        raise RpcPoolError(f"RPC failed after {retries} attempts") from last_error
+
+    def send(self, payload):
+        """Sends a JSON-RPC payload dict and returns the decoded response dict."""
+        return json.loads(self.post(json.dumps(payload).encode()))
+
+    def request(self, method, params=()):
+        """Returns the `result` of one call; JSON-RPC errors raise ValueError."""
+        with self._lock:
+            self._id += 1
+            request_id = self._id
+        body = self.send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": list(params)})
+        if "error" in body:
+            raise ValueError(body["error"])
+        return body["result"]
+
+    def probe(self):
+        """Measures every endpoint once with eth_blockNumber."""
+        payload = json.dumps({"jsonrpc": "2.0", "id": 0, "method": "eth_blockNumber", "params": []})
+        for endpoint in self.endpoints:
+            started = time.monotonic()
+            try:
+                resp = endpoint.session.post(endpoint.url, data=payload, timeout=self.timeout)
+                resp.raise_for_status()
+                number = int(resp.json()["result"], 16)
+            except Exception:
+                with self._lock:
+                    endpoint.stats["errors"] += 1
+                self._mark_down(endpoint, ERROR_COOLDOWN)
+                continue
+            with self._lock:
+                endpoint.record_latency(time.monotonic() - started)
+                endpoint.block_number = number
+        # Endpoints serving stale state are skipped until they catch up
+        heights = [e.block_number for e in self.endpoints if e.block_number is not None]
+        for endpoint in self.endpoints:
+            if endpoint.block_number is not None and max(heights) - endpoint.block_number > MAX_BLOCK_LAG:
+                self._mark_down(endpoint, self.probe_interval)
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.probe_interval):
+            self.probe()
+
+    def start_probes(self):
+        """Starts the background health probe thread (daemon; one per pool)."""
+        if self._prober is None:
+            self.probe()
+            self._prober = threading.Thread(target=self._probe_loop, name="rpc-pool-probe", daemon=True)
+            self._prober.start()
+
+    def close(self):
+        self._stop.set()
+        for endpoint in self.endpoints:
+            endpoint.session.close()
+
+    def stats(self):
+        """Per-endpoint latency, health and counters."""
+        return [e.snapshot() for e in self.endpoints]
+
+
+_pools = {}
+_provider_class = None
+
+
+def urls_from_env(*names):
+    """Endpoint URLs from RPC_URLS (comma-separated) or the given env vars, in order."""
+    urls = [u.strip() for u in os.getenv("RPC_URLS", "").split(",") if u.strip()]
+    return urls + [os.getenv(n) for n in names if os.getenv(n)]
+
+
+def get_pool(urls=None):
+    """Shared pool for `urls` (QuickNode then Infura from the environment by default)."""
+    urls = tuple(urls or urls_from_env("QUICKNODE_ENDPOINT", "INFURA_URL"))
+    if urls not in _pools:
+        pool = RpcPool(urls)
+        if os.getenv("RPC_PROBES", "1") == "1" and len(pool.endpoints) > 1:
+            pool.start_probes()
+        _pools[urls] = pool
+    return _pools[urls]
+
+
+def make_web3(pool=None):
+    """Web3 client whose requests go through `pool` (the shared pool by default)."""
+    global _provider_class
+    from web3 import Web3
+
+    if _provider_class is None:
+        from web3.providers import JSONBaseProvider
+
+        class PoolProvider(JSONBaseProvider):
+            """web3 provider adapter over an RpcPool."""
+
+            def __init__(self, pool, **kwargs):
+                super().__init__(**kwargs)
+                self.pool = pool
+
+            def make_request(self, method, params):
+                return self.decode_rpc_response(self.pool.post(self.encode_rpc_request(method, params)))
+
+        _provider_class = PoolProvider
+
+    return Web3(_provider_class(pool or get_pool()))
@@ -1,10 +1,21 @@
 import json
-from transaction import Transaction
-from mev_optimization import compute_batch
+import os
+import numpy as np
+from transaction import TransactionBatch
+from mev_optimization import compute_batch_multi
 
 # Canonical WETH address (Ethereum mainnet)
 WETH_ADDRESS = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
 
+# Base assets in priority order; a pair of two bases is credited to the first one.
+# MEV_BASE_ASSETS (comma-separated addresses, e.g. WETH,USDC,USDT,DAI) overrides WETH only.
+BASE_ASSETS = [a.strip().lower() for a in os.getenv("MEV_BASE_ASSETS", WETH_ADDRESS).split(",") if a.strip()]
+
+# PRICE_IMPACT=1 values every executed set by selling it into its Uniswap V2 pool (x*y=k,
+# 0.3% fee) with the reserves token_pricing saved next to exo.json, at the block exo.json
+# was priced at; only pools it never read are fetched, pinned to that block
+PRICE_IMPACT = os.getenv("PRICE_IMPACT") == "1"
+
 def infer_rate_and_qty(swap):
     fn = swap.get("function", "")
     a_in = swap.get("amountIn")
@@ -32,7 +43,114 @@ def infer_rate_and_qty(swap):
     return q, r
 
 
-if __name__ == "__main__":
+def aggregate_results(results, batch):
+    """Per-pair gas and profit metrics plus the `_summary` block, in one pass over `results`.
+
+    Candidate txs are grouped by unordered token pair once, so each pair reads only its
+    own rows. Gas sums add the known, non-zero fees in batch order, as the per-pair scans did.
+    """
+    # Rows of every unordered pair, in batch order
+    n_tokens = max(len(batch.tokens), 1)
+    codes = np.minimum(batch.src, batch.dst) * n_tokens + np.maximum(batch.src, batch.dst)
+    order = np.argsort(codes, kind="stable")
+    bounds = (np.flatnonzero(np.diff(codes[order])) + 1).tolist()
+    groups = {int(codes[order[start]]): order[start:end] for start, end in zip([0] + bounds, bounds + [len(order)])
+              if end > start}
+    token_ids = {t: i for i, t in enumerate(batch.tokens)}
+    no_rows = np.zeros(0, dtype=np.int64)
+    gas_eth, gas_usd = batch.gas_fee_eth, batch.gas_fee_usd
+    paid_eth = (gas_eth != 0) & ~np.isnan(gas_eth)
+    paid_usd = (gas_usd != 0) & ~np.isnan(gas_usd)
+
+    serializable = {}
+    # Global aggregates
+    total_profit_usd = 0.0
+    total_included_gas_usd = 0.0
+    total_missed_gas_usd = 0.0
+    pairs_total = 0
+    pairs_executed = 0
+    executed_tx_total = 0
+    candidate_tx_total = 0
+
+    for pair, info in results.items():
+        base, other = pair
+
+        # All candidate txs for this pair (both directions)
+        rows = no_rows
+        if base in token_ids and other in token_ids:
+            a, b = sorted((token_ids[base], token_ids[other]))
+            rows = groups.get(a * n_tokens + b, no_rows)
+
+        executed_list = info.get("executed") or []
+
+        # Gas paid by executed txs and how many there are (the mediator has no gas fee)
+        included_gas_eth = 0
+        included_gas_usd = 0
+        executed_count = 0
+        for t in executed_list:
+            if t.gas_fee_eth is not None:
+                executed_count += 1
+            if t.gas_fee_eth:
+                included_gas_eth += t.gas_fee_eth
+            if t.gas_fee_usd:
+                included_gas_usd += t.gas_fee_usd
+
+        # Sum gas across all candidate txs for the pair
+        total_candidate_gas_eth = sum(gas_eth[rows[paid_eth[rows]]].tolist())
+        total_candidate_gas_usd = sum(gas_usd[rows[paid_usd[rows]]].tolist())
+
+        # Missed gas is the gas not included by the executed subset
+        missed_gas_eth = max(total_candidate_gas_eth - included_gas_eth, 0.0)
+        missed_gas_usd = max(total_candidate_gas_usd - included_gas_usd, 0.0)
+
+        # Profit from optimizer is in USD (uses exo prices); compute net after included gas
+        # Update global aggregates and counts
+        total_profit_usd += (info.get("profit") or 0.0)
+        total_included_gas_usd += included_gas_usd
+        total_missed_gas_usd += missed_gas_usd
+        pairs_total += 1
+        if executed_count:
+            pairs_executed += 1
+        executed_tx_total += executed_count
+        candidate_tx_total += len(rows)
+
+        net_profit_after_included_gas_usd = (info.get("profit") or 0.0) - included_gas_usd
+
+        serializable[str(pair)] = {
+            "decision": info.get("decision"),
+            "profit": info.get("profit"),
+            "net_profit_after_included_gas_usd": net_profit_after_included_gas_usd,
+            "src_symbol": executed_list[0].src_symbol if executed_list else None,
+            "dst_symbol": executed_list[-1].dst_symbol if executed_list else None,
+            # Gas paid by executed subset
+            "included_gas_eth": included_gas_eth,
+            "included_gas_usd": included_gas_usd,
+            # Total candidate gas and missed opportunity
+            "total_candidate_gas_eth": total_candidate_gas_eth,
+            "total_candidate_gas_usd": total_candidate_gas_usd,
+            "missed_gas_eth": missed_gas_eth,
+            "missed_gas_usd": missed_gas_usd,
+        }
+
+    # Build global summary
+    total_net_profit_after_included = total_profit_usd - total_included_gas_usd
+    ratio = (total_net_profit_after_included / total_missed_gas_usd) if total_missed_gas_usd > 0 else None
+
+    serializable["_summary"] = {
+        "pairs_total": pairs_total,
+        "pairs_executed": pairs_executed,
+        "candidate_tx_total": candidate_tx_total,
+        "executed_tx_total": executed_tx_total,
+        "total_profit_usd": total_profit_usd,
+        "total_included_gas_usd": total_included_gas_usd,
+        "total_missed_gas_usd": total_missed_gas_usd,
+        "total_net_profit_after_included_gas_usd": total_net_profit_after_included,
+        "realized_to_missed_ratio": ratio,
+    }
+    return serializable
+
+
+def main():
     # Load processed mempool and exogenous price map
     with open("decoded_swaps.json") as f:
         swaps = json.load(f)
@@ -52,7 +170,15 @@ if __name__ == "__main__":
         }
     print(f"Loaded {len(exo)} token prices from exo.json")
 
-    batch = []
+    # WETH price for gas in USD, looked up once for all swaps
+    weth_entry = next((v for k, v in exo.items() if v["symbol"] == "WETH"), None)
+    if weth_entry and "price_usd" in weth_entry:
+        weth_price_usd = weth_entry["price_usd"]
+    else:
+        # Hardcoded fallback WETH price as of Oct 23 2025, 10:30PM (UTC+1)
+        weth_price_usd = 3842.42
+
+    batch = TransactionBatch()
     for swap in swaps:
         path = swap.get("path", [])
         if len(path) >= 2:
@@ -136,136 +262,50 @@ if __name__ == "__main__":
             gas_used = _coerce_int(swap.get("gasUsed") or swap.get("gas") or 0)
             gas_fee_eth = (gas_price_wei * gas_used) / 1e18 if gas_price_wei and gas_used else 0.0
 
-            tx = Transaction(src, dst, q, r)
-            tx.src_symbol = src_symbol
-            tx.dst_symbol = dst_symbol
-            tx.gas_fee_eth = gas_fee_eth
+            # estimate gas fee in USD from the WETH price resolved above
+            gas_fee_usd = gas_fee_eth * weth_price_usd
 
-            # estimate gas fee in USD if WETH or ETH price available
-            weth_entry = next((v for k, v in exo.items() if v["symbol"] == "WETH"), None)
-            if weth_entry and "price_usd" in weth_entry:
-                tx.gas_fee_usd = gas_fee_eth * weth_entry["price_usd"]
-            else:
-                # Hardcoded fallback WETH price as of Oct 23 2025, 10:30PM (UTC+1)
-                fallback_weth_price_usd = 3842.42
-                tx.gas_fee_usd = gas_fee_eth * fallback_weth_price_usd
-
-            batch.append(tx)
+            batch.append(src, dst, q, r, src_symbol, dst_symbol, gas_fee_eth, gas_fee_usd)
 
-    # Filter out transactions missing exo data (address-based lookup)
-    valid_batch = []
-    for tx in batch:
-        if tx.src in exo and tx.dst in exo:
-            valid_batch.append(tx)
-        else:
-            src_sym = getattr(tx, "src_symbol", tx.src)
-            dst_sym = getattr(tx, "dst_symbol", tx.dst)
-            print(f"Skipping {src_sym} ({tx.src})->{dst_sym} ({tx.dst}) (missing exo price data)")
+    # Filter out transactions missing exo data (address-based lookup, once per token id)
+    priced = np.array([t in exo for t in batch.tokens], dtype=bool)
+    has_exo = priced[batch.src] & priced[batch.dst] if len(batch) else np.zeros(0, dtype=bool)
+    for i in np.flatnonzero(~has_exo).tolist():
+        src, dst = batch.tokens[batch.src[i]], batch.tokens[batch.dst[i]]
+        print(f"Skipping {batch.symbol(i, 'src')} ({src})->{batch.symbol(i, 'dst')} ({dst}) (missing exo price data)")
+    valid_batch = batch.take(has_exo)
 
     print(f"Running MEV optimization on {len(valid_batch)} valid transactions...")
 
     # Extract price map for optimizer (pure address: price_usd)
     exo_numeric = {addr: data["price_usd"] for addr, data in exo.items()}
-    results = compute_batch(valid_batch, exo_numeric, base_asset=WETH_ADDRESS.lower())
+    reserves = None
+    if PRICE_IMPACT:
+        from token_pricing import fetch_pool_depths, load_reserves
+
+        # Every pair a tx trades against a base asset. A pool's spot price can differ from
+        # exo.json (non-WETH bases, GRAPH_PRICING), so pairs with nothing executed at exo
+        # prices can still hold a set worth executing against the pool.
+        base_ids = [i for i, t in enumerate(valid_batch.tokens) if t in BASE_ASSETS]
+        on_base = np.isin(valid_batch.src, base_ids) | np.isin(valid_batch.dst, base_ids)
+        pairs = list(dict.fromkeys(
+            tuple(sorted((valid_batch.tokens[a], valid_batch.tokens[b])))
+            for a, b in zip(valid_batch.src[on_base].tolist(), valid_batch.dst[on_base].tolist()) if a != b
+        ))
+        block = load_reserves()
+        decimals = {addr: data["decimals"] for addr, data in exo.items()}
+        reserves = fetch_pool_depths(pairs, decimals, block)
+        print(f"Loaded reserves for {len(reserves)} of {len(pairs)} candidate pools at block {block}")
+    results = compute_batch_multi(valid_batch, exo_numeric, BASE_ASSETS, reserves=reserves)
 
     # Serialize final results with missed gas metrics
-    serializable = {}
-    # Global aggregates
-    total_profit_usd = 0.0
-    total_included_gas_usd = 0.0
-    total_missed_gas_usd = 0.0
-    pairs_total = 0
-    pairs_executed = 0
-    executed_tx_total = 0
-    candidate_tx_total = 0
-
-    for pair, info in results.items():
-        base, other = pair
-
-        # All candidate txs for this pair (both directions)
-        candidates = [
-            t for t in valid_batch
-            if (t.src == base and t.dst == other) or (t.src == other and t.dst == base)
-        ]
-
-        executed_list = info.get("executed") or []
-
-        # Sum gas paid by executed txs (mediator has None, excluded by guard)
-        included_gas_eth = sum(
-            (getattr(t, "gas_fee_eth", 0.0) or 0.0)
-            for t in executed_list
-            if getattr(t, "gas_fee_eth", None)
-        )
-        included_gas_usd = sum(
-            (getattr(t, "gas_fee_usd", 0.0) or 0.0)
-            for t in executed_list
-            if getattr(t, "gas_fee_usd", None)
-        )
-
-        # Sum gas across all candidate txs for the pair
-        total_candidate_gas_eth = sum(
-            (getattr(t, "gas_fee_eth", 0.0) or 0.0)
-            for t in candidates
-            if getattr(t, "gas_fee_eth", None)
-        )
-        total_candidate_gas_usd = sum(
-            (getattr(t, "gas_fee_usd", 0.0) or 0.0)
-            for t in candidates
-            if getattr(t, "gas_fee_usd", None)
-        )
-
-        # Missed gas is the gas not included by the executed subset
-        missed_gas_eth = max(total_candidate_gas_eth - included_gas_eth, 0.0)
-        missed_gas_usd = max(total_candidate_gas_usd - included_gas_usd, 0.0)
-
-        # Profit from optimizer is in USD (uses exo prices); compute net after included gas
-        # Update global aggregates and counts
-        executed_real = [t for t in executed_list if getattr(t, "gas_fee_eth", None) is not None]
-        executed_count = len(executed_real)
-        candidate_count = len(candidates)
-
-        total_profit_usd += (info.get("profit") or 0.0)
-        total_included_gas_usd += included_gas_usd
-        total_missed_gas_usd += missed_gas_usd
-        pairs_total += 1
-        if executed_real:
-            pairs_executed += 1
-        executed_tx_total += executed_count
-        candidate_tx_total += candidate_count
-
-        net_profit_after_included_gas_usd = (info.get("profit") or 0.0) - included_gas_usd
-
-        serializable[str(pair)] = {
-            "decision": info.get("decision"),
-            "profit": info.get("profit"),
-            "net_profit_after_included_gas_usd": net_profit_after_included_gas_usd,
-            "src_symbol": getattr(executed_list[0], "src_symbol", None) if executed_list else None,
-            "dst_symbol": getattr(executed_list[-1], "dst_symbol", None) if executed_list else None,
-            # Gas paid by executed subset
-            "included_gas_eth": included_gas_eth,
-            "included_gas_usd": included_gas_usd,
-            # Total candidate gas and missed opportunity
-            "total_candidate_gas_eth": total_candidate_gas_eth,
-            "total_candidate_gas_usd": total_candidate_gas_usd,
-            "missed_gas_eth": missed_gas_eth,
-            "missed_gas_usd": missed_gas_usd,
-        }
-
-    # Build global summary
-    total_net_profit_after_included = total_profit_usd - total_included_gas_usd
-    ratio = (total_net_profit_after_included / total_missed_gas_usd) if total_missed_gas_usd > 0 else None
-
-    serializable["_summary"] = {
-        "pairs_total": pairs_total,
-        "pairs_executed": pairs_executed,
-        "candidate_tx_total": candidate_tx_total,
-        "executed_tx_total": executed_tx_total,
-        "total_profit_usd": total_profit_usd,
-        "total_included_gas_usd": total_included_gas_usd,
-        "total_missed_gas_usd": total_missed_gas_usd,
-        "total_net_profit_after_included_gas_usd": total_net_profit_after_included,
-        "realized_to_missed_ratio": ratio,
-    }
+    serializable = aggregate_results(results, valid_batch)
+    summary = serializable["_summary"]
+    pairs_total, pairs_executed = summary["pairs_total"], summary["pairs_executed"]
+    executed_tx_total, candidate_tx_total = summary["executed_tx_total"], summary["candidate_tx_total"]
+    total_profit_usd, total_included_gas_usd = summary["total_profit_usd"], summary["total_included_gas_usd"]
+    total_missed_gas_usd, ratio = summary["total_missed_gas_usd"], summary["realized_to_missed_ratio"]
+    total_net_profit_after_included = summary["total_net_profit_after_included_gas_usd"]
 
     # Pretty CLI summary
     print("\n=== MEV Summary ===")
@@ -295,3 +335,8 @@ if __name__ == "__main__":
         json.dump(serializable, f, indent=2)
 
     print(f"MEV optimization complete -> {len(serializable)} results saved to mev_results.json")
+    return serializable
+
+
+if __name__ == "__main__":
+    main()
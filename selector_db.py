@@ -0,0 +1,78 @@
+import json
+import os
+
+# Offline function-selector database.
+# Resolves 4-byte selectors from a bundled signature file (plus an optional local one)
+# so the decode loop never waits on 4byte.directory. Lookups are memoized, and
+# selectors with no match are remembered so each is only reported once per run.
+
+BUNDLED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selectors.json")
+# Extra signatures fetched with `python selector_db.py fetch ...` land here
+LOCAL_PATH = os.getenv("SELECTOR_DB_PATH", "selectors.local.json")
+
+_signatures = None
+_unknown = set()
+
+
+def load(paths=None):
+    """Loads selector -> text signature maps; later files override earlier ones."""
+    global _signatures
+    paths = paths if paths is not None else [BUNDLED_PATH, LOCAL_PATH]
+    merged = {}
+    for path in paths:
+        if os.path.exists(path):
+            with open(path) as f:
+                merged.update({k.lower(): v for k, v in json.load(f).items()})
+    _signatures = merged
+    _unknown.clear()
+    return merged
+
+
+def lookup(selector):
+    """Text signature for a 0x-prefixed selector, or None (cached as unknown)."""
+    if _signatures is None:
+        load()
+    selector = selector.lower()
+    if selector in _unknown:
+        return None
+    signature = _signatures.get(selector)
+    if signature is None:
+        _unknown.add(selector)
+    return signature
+
+
+def fetch_from_4byte(selectors, path=LOCAL_PATH):
+    """Out-of-band refresh: resolves selectors on 4byte.directory and saves them to `path`."""
+    import requests
+
+    local = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            local = json.load(f)
+    for selector in selectors:
+        url = f"https://www.4byte.directory/api/v1/signatures/?hex_signature={selector}"
+        try:
+            res = requests.get(url, timeout=5)
+            results = res.json().get("results", []) if res.status_code == 200 else []
+        except Exception as e:
+            print(f"Selector lookup error for {selector}: {e}")
+            continue
+        if results:
+            local[selector.lower()] = results[0]["text_signature"]
+            print(f"Resolved {selector} -> {local[selector.lower()]}")
+        else:
+            print(f"No match found for {selector} in 4byte directory")
+    with open(path, "w") as f:
+        json.dump(dict(sorted(local.items())), f, indent=2)
+    load()
+    return local
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 2 and sys.argv[1] == "fetch":
+        fetch_from_4byte(sys.argv[2:])
+    else:
+        for sel in sys.argv[1:]:
+            print(f"{sel} -> {lookup(sel)}")
@@ -0,0 +1,131 @@
+import json
+import os
+
+# Delta-encoded snapshot log.
+#
+# A log is a JSON-lines file: one `base` record holding a full pending pool, then
+# `delta` records with the txs added (or replaced) and the (sender, nonce) keys removed
+# since the previous record. Successive txpool dumps are mostly identical, so each
+# cycle only stores and decodes the churn.
+
+# Rewrite the log as a fresh base after this many deltas to bound replay time
+DEFAULT_REBASE_EVERY = 500
+
+
+def tx_key(tx):
+    """(sender, nonce) identity of a pending tx."""
+    nonce = tx["nonce"]
+    if isinstance(nonce, str):
+        nonce = int(nonce, 16) if nonce.startswith("0x") else int(nonce)
+    return tx["from"].lower(), nonce
+
+
+def index_pending(pending):
+    """Maps a txpool `pending` section to {(sender, nonce): tx}."""
+    return {tx_key(tx): tx for txs in pending.values() for tx in txs.values()}
+
+
+def diff(prev, cur):
+    """Returns (added, removed) between two indexed pools; replacements count as added."""
+    added = [tx for key, tx in cur.items() if prev.get(key, {}).get("hash") != tx.get("hash")]
+    removed = [list(key) for key in prev if key not in cur]
+    return added, removed
+
+
+def _replay(path):
+    state = {}
+    seq = -1
+    last_added = set()
+    since_base = 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["kind"] == "base":
+                state = {tx_key(tx): tx for tx in record["txs"]}
+                last_added = set(state)
+                since_base = 0
+            else:
+                for sender, nonce in record["removed"]:
+                    state.pop((sender, nonce), None)
+                last_added = set()
+                for tx in record["added"]:
+                    key = tx_key(tx)
+                    state[key] = tx
+                    last_added.add(key)
+                since_base += 1
+            seq = record["seq"]
+    return state, seq, last_added, since_base
+
+
+def replay(path):
+    """Rebuilds the pool from a log; returns (state, seq, keys added by the last record)."""
+    state, seq, last_added, _ = _replay(path)
+    return state, seq, last_added
+
+
+class DeltaWriter:
+    """Appends deltas to a snapshot log, starting a new base every `rebase_every` records."""
+
+    def __init__(self, path, rebase_every=DEFAULT_REBASE_EVERY):
+        self.path = path
+        self.rebase_every = rebase_every
+        self.state = {}
+        self.seq = -1
+        self.since_base = 0
+        if os.path.exists(path):
+            # Resume an existing log so periodic one-shot runs keep appending deltas
+            self.state, self.seq, _, self.since_base = _replay(path)
+
+    def _write_base(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(json.dumps({"kind": "base", "seq": self.seq, "txs": list(self.state.values())}) + "\n")
+        os.replace(tmp, self.path)
+        self.since_base = 0
+
+    def append(self, pending):
+        """Records the new pending section; returns (added, removed) counts."""
+        cur = index_pending(pending)
+        added, removed = diff(self.state, cur)
+        self.state = cur
+        self.seq += 1
+
+        if self.seq == 0 or self.since_base >= self.rebase_every:
+            self._write_base()
+            return len(added), len(removed)
+
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"kind": "delta", "seq": self.seq, "added": added, "removed": removed}) + "\n")
+        self.since_base += 1
+        return len(added), len(removed)
+
+
+def load_filtered(path, addresses):
+    """Current pool from the log, restricted to txs sent to `addresses`."""
+    wanted = {a.lower() for a in addresses}
+    state, _, _ = replay(path)
+    return [tx for tx in state.values() if tx.get("to") and tx["to"].lower() in wanted]
+
+
+def load_decode_cache(path):
+    """Indexes a previous decoded_swaps.json by (sender, nonce, hash) for reuse."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        try:
+            trades = json.load(f)
+        except ValueError:
+            return {}
+    cache = {}
+    for trade in trades:
+        if trade.get("from") is None or trade.get("nonce") is None:
+            continue
+        cache[(trade["from"].lower(), trade["nonce"], trade.get("hash"))] = trade
+    return cache
+
+
+def decode_key(tx):
+    sender, nonce = tx_key(tx)
+    return sender, nonce, tx.get("hash")
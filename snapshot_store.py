@@ -0,0 +1,247 @@
+import mmap
+import struct
+
+# Columnar binary snapshot format for pending pools.
+#
+# Layout (all integers little-endian unless noted):
+#   header   MAGIC, version u32, row count u64, column count u32
+#   table    per column: name (16 bytes, NUL padded), offset u64, length u64
+#   columns  fixed-width columns back to back, then the calldata offsets
+#            (u64 per row + 1) and the calldata heap
+#
+# Amounts are stored as 32-byte big-endian words like the EVM does, so nothing
+# is truncated. Nullable fields have a bit in the `flags` column; a contract creation
+# (no `to`) stores `to` as 20 zero bytes with FLAG_TO unset, so the `to` column alone
+# can't tell it apart from a tx to the zero address.
+
+MAGIC = b"MACAUSN1"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sIQI")
+_TABLE_ENTRY = struct.Struct("<16sQQ")
+
+# (name, width in bytes)
+COLUMNS = [
+    ("hash", 32),
+    ("from", 20),
+    ("to", 20),
+    ("nonce", 8),
+    ("gas", 8),
+    ("gasPrice", 32),
+    ("maxFee", 32),
+    ("maxPriorityFee", 32),
+    ("value", 32),
+    ("type", 1),
+    ("flags", 1),
+]
+COLUMN_WIDTHS = dict(COLUMNS)
+
+# Set when the tx has a `to` (unset for contract creations)
+FLAG_TO = 1
+FLAG_GAS_PRICE = 2
+FLAG_MAX_FEE = 4
+FLAG_MAX_PRIORITY_FEE = 8
+FLAG_TYPE = 16
+
+# txpool field -> (column, flag) for nullable 32-byte amounts
+_OPTIONAL_AMOUNTS = [
+    ("gasPrice", "gasPrice", FLAG_GAS_PRICE),
+    ("maxFeePerGas", "maxFee", FLAG_MAX_FEE),
+    ("maxPriorityFeePerGas", "maxPriorityFee", FLAG_MAX_PRIORITY_FEE),
+]
+
+
+def _qty(x):
+    if x is None:
+        return 0
+    if isinstance(x, int):
+        return x
+    return int(x, 16) if x.startswith("0x") else int(x)
+
+
+def _hex_bytes(x, width=None):
+    raw = bytes.fromhex(x[2:] if x.startswith("0x") else x)
+    if width is not None and len(raw) != width:
+        raise ValueError(f"Expected {width} bytes, got {len(raw)} from {x}")
+    return raw
+
+
+def iter_pending(pending):
+    """Flattens a txpool `pending` section into txs ordered by sender then nonce key."""
+    for txs in pending.values():
+        for tx in txs.values():
+            yield tx
+
+
+def write_snapshot(path, txs):
+    """Writes an iterable of txpool-style tx dicts to `path` in columnar form; returns row count."""
+    cols = {name: bytearray() for name, _ in COLUMNS}
+    offsets = bytearray()
+    heap = bytearray()
+    count = 0
+
+    for tx in txs:
+        flags = 0
+        cols["hash"] += _hex_bytes(tx["hash"], 32)
+        cols["from"] += _hex_bytes(tx["from"], 20)
+        if tx.get("to"):
+            cols["to"] += _hex_bytes(tx["to"], 20)
+            flags |= FLAG_TO
+        else:
+            cols["to"] += bytes(20)
+        cols["nonce"] += struct.pack("<Q", _qty(tx["nonce"]))
+        cols["gas"] += struct.pack("<Q", _qty(tx.get("gas")))
+        for field, column, flag in _OPTIONAL_AMOUNTS:
+            value = tx.get(field)
+            if value is not None:
+                flags |= flag
+            cols[column] += _qty(value).to_bytes(32, "big")
+        cols["value"] += _qty(tx.get("value")).to_bytes(32, "big")
+        if tx.get("type") is not None:
+            flags |= FLAG_TYPE
+        cols["type"].append(_qty(tx.get("type")))
+        cols["flags"].append(flags)
+
+        offsets += struct.pack("<Q", len(heap))
+        heap += _hex_bytes(tx.get("input") or "0x")
+        count += 1
+    offsets += struct.pack("<Q", len(heap))
+
+    sections = [(name, cols[name]) for name, _ in COLUMNS]
+    sections += [("calldataOffsets", offsets), ("calldata", heap)]
+
+    table_start = _HEADER.size
+    offset = table_start + _TABLE_ENTRY.size * len(sections)
+    table = bytearray()
+    for name, data in sections:
+        table += _TABLE_ENTRY.pack(name.encode(), offset, len(data))
+        offset += len(data)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, count, len(sections)))
+        f.write(table)
+        for _, data in sections:
+            f.write(data)
+    return count
+
+
+class SnapshotReader:
+    """Memory-mapped reader; columns are exposed as zero-copy memoryviews.
+
+    Views returned by `column()` are valid until the reader is closed; closing releases
+    them, so keep a copy (`bytes(view)`) of anything needed afterwards. Slices taken
+    from a view keep the mapping alive until they are dropped.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        # Views handed out by column(); each pins the mmap until released
+        self._exported = []
+        magic, version, count, ncols = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a columnar snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        self.count = count
+        self._sections = {}
+        for i in range(ncols):
+            name, offset, length = _TABLE_ENTRY.unpack_from(self._mm, _HEADER.size + i * _TABLE_ENTRY.size)
+            self._sections[name.rstrip(b"\x00").decode()] = (offset, length)
+
+    def close(self):
+        for view in self._exported:
+            view.release()
+        self._exported.clear()
+        self._view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            # A caller still holds a slice taken from a column view; the mapping is
+            # unmapped once the last such slice is dropped
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """Raw bytes of one column without touching any other (released on close)."""
+        offset, length = self._sections[name]
+        view = self._view[offset:offset + length]
+        self._exported.append(view)
+        return view
+
+    def find_to(self, addresses):
+        """Row indices whose `to` is one of `addresses`, scanning only the `to` column."""
+        col = self._mm
+        base, length = self._sections["to"]
+        end = base + length
+        rows = set()
+        for addr in addresses:
+            needle = _hex_bytes(addr, 20)
+            pos = col.find(needle, base, end)
+            while pos != -1:
+                # Matches straddling two cells are rejected by the alignment check
+                if (pos - base) % 20 == 0:
+                    rows.add((pos - base) // 20)
+                pos = col.find(needle, pos + 1, end)
+        return sorted(rows)
+
+    def _cell(self, name, row):
+        width = COLUMN_WIDTHS[name]
+        offset, _ = self._sections[name]
+        start = offset + row * width
+        return self._mm[start:start + width]
+
+    def calldata(self, row):
+        offset, _ = self._sections["calldataOffsets"]
+        start, end = struct.unpack_from("<QQ", self._mm, offset + row * 8)
+        heap, _ = self._sections["calldata"]
+        return self._mm[heap + start:heap + end]
+
+    def row(self, row):
+        """Rebuilds a txpool-style tx dict (hex strings) for one row."""
+        flags = self._cell("flags", row)[0]
+
+        def amount(name, flag=None):
+            if flag is not None and not flags & flag:
+                return None
+            return hex(int.from_bytes(self._cell(name, row), "big"))
+
+        return {
+            "hash": "0x" + self._cell("hash", row).hex(),
+            "from": "0x" + self._cell("from", row).hex(),
+            "to": "0x" + self._cell("to", row).hex() if flags & FLAG_TO else None,
+            "nonce": hex(struct.unpack("<Q", self._cell("nonce", row))[0]),
+            "gas": hex(struct.unpack("<Q", self._cell("gas", row))[0]),
+            "gasPrice": amount("gasPrice", FLAG_GAS_PRICE),
+            "maxFeePerGas": amount("maxFee", FLAG_MAX_FEE),
+            "maxPriorityFeePerGas": amount("maxPriorityFee", FLAG_MAX_PRIORITY_FEE),
+            "value": amount("value"),
+            "type": hex(self._cell("type", row)[0]) if flags & FLAG_TYPE else None,
+            "input": "0x" + self.calldata(row).hex(),
+        }
+
+
+def load_filtered(path, addresses):
+    """Returns txs addressed to any of `addresses`; only matching rows are decoded."""
+    with SnapshotReader(path) as reader:
+        return [reader.row(i) for i in reader.find_to(addresses)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    snap = sys.argv[1] if len(sys.argv) > 1 else "sample.snap"
+    router = "0x7a250d5630b4cf539739df2c5dacb4c659f2488d"
+    with SnapshotReader(snap) as reader:
+        rows = reader.find_to([router])
+        print(f"{snap}: {len(reader)} txs, {len(rows)} to {router}")
@@ -0,0 +1,175 @@
+import re
+
+# Uniswap V2 Router02 swap calldata decoding.
+# All nine swap selectors share one shape: one or two uint256 words, a dynamic
+# address[] path, the recipient and a deadline. The fast path reads those words by
+# fixed offset straight from the calldata hex and only falls back to eth_abi when
+# the layout looks off (non-canonical offsets, dirty address padding, truncation),
+# so malformed input is judged exactly as before.
+
+# Router swap functions by selector
+SWAP_FUNCTIONS = {
+    "0x7ff36ab5": {  # swapExactETHForTokens
+        "name": "swapExactETHForTokens",
+        "inputs": [
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+    "0xfb3bdb41": {  # swapETHForExactTokens
+        "name": "swapETHForExactTokens",
+        "inputs": [
+            {"name": "amountOut", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+    "0x38ed1739": {  # swapExactTokensForTokens
+        "name": "swapExactTokensForTokens",
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+    "0x8803dbee": {  # swapTokensForExactTokens
+        "name": "swapTokensForExactTokens",
+        "inputs": [
+            {"name": "amountOut", "type": "uint256"},
+            {"name": "amountInMax", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+    "0x18cbafe5": {  # swapExactTokensForETH
+        "name": "swapExactTokensForETH",
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+    "0x4a25d94a": {  # swapTokensForExactETH
+        "name": "swapTokensForExactETH",
+        "inputs": [
+            {"name": "amountOut", "type": "uint256"},
+            {"name": "amountInMax", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+    "0xb6f9de95": {  # swapExactETHForTokensSupportingFeeOnTransferTokens
+        "name": "swapExactETHForTokensSupportingFeeOnTransferTokens",
+        "inputs": [
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+    "0x791ac947": {  # swapExactTokensForETHSupportingFeeOnTransferTokens
+        "name": "swapExactTokensForETHSupportingFeeOnTransferTokens",
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+    "0x5c11d795": {  # swapExactTokensForTokensSupportingFeeOnTransferTokens
+        "name": "swapExactTokensForTokensSupportingFeeOnTransferTokens",
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"},
+        ],
+    },
+}
+
+# selector -> (abi entry, eth_abi types, number of leading uint256 words)
+_LAYOUTS = {}
+for _selector, _entry in SWAP_FUNCTIONS.items():
+    _types = [inp["type"] for inp in _entry["inputs"]]
+    _LAYOUTS[_selector] = (_entry, _types, _types.index("address[]"))
+
+_WORD = 64  # hex chars per 32-byte word
+# int(x, 16) tolerates "_" and whitespace, bytes.fromhex does not
+_HEX = re.compile(r"[0-9a-fA-F]*")
+_ADDRESS_PAD = "0" * 24
+
+
+def _word_address(word):
+    # eth_abi hands addresses back lowercased, so no checksumming here either
+    if not word.startswith(_ADDRESS_PAD):
+        raise ValueError("dirty address padding")
+    return "0x" + word[24:].lower()
+
+
+def _fast_decode(payload, n_uints):
+    # payload is the calldata hex after the selector, without 0x
+    head_words = n_uints + 3
+    if len(payload) < head_words * _WORD or len(payload) % _WORD:
+        raise ValueError("unexpected calldata length")
+    if not _HEX.fullmatch(payload):
+        raise ValueError("non-hex calldata")
+    words = [payload[i * _WORD:(i + 1) * _WORD] for i in range(head_words)]
+    amounts = [int(w, 16) for w in words[:n_uints]]
+    offset = int(words[n_uints], 16)
+    if offset != head_words * 32:
+        raise ValueError("non-canonical path offset")
+    length = int(payload[offset * 2:offset * 2 + _WORD], 16)
+    start = offset * 2 + _WORD
+    end = start + length * _WORD
+    if end != len(payload):
+        raise ValueError("path length does not match calldata")
+    path = tuple(_word_address(payload[i:i + _WORD]) for i in range(start, end, _WORD))
+    to = _word_address(words[n_uints + 1])
+    deadline = int(words[n_uints + 2], 16)
+    return (*amounts, path, to, deadline)
+
+
+def decode_args(selector, payload):
+    """Decodes the arguments of a router swap; `payload` is the hex after the selector.
+
+    Returns the same tuple eth_abi.decode would, and raises what it would raise.
+    """
+    entry, types, n_uints = _LAYOUTS[selector]
+    try:
+        return _fast_decode(payload, n_uints)
+    except ValueError:
+        from eth_abi import decode
+
+        return decode(types, bytes.fromhex(payload))
+
+
+def decode_batch(inputs):
+    """Decodes many calldata hex strings in one pass.
+
+    Returns one item per input: None for selectors outside SWAP_FUNCTIONS,
+    otherwise (abi_entry, decoded args) or (abi_entry, exception) when malformed.
+    """
+    results = []
+    for input_data in inputs:
+        selector = input_data[:10]
+        layout = _LAYOUTS.get(selector)
+        if layout is None:
+            results.append(None)
+            continue
+        try:
+            results.append((layout[0], decode_args(selector, input_data[10:])))
+        except Exception as e:
+            results.append((layout[0], e))
+    return results
+
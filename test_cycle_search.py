@@ -0,0 +1,73 @@
+import itertools
+import math
+import random
+from transaction import Transaction
+from cycle_search import MIN_GAIN, find_cycles
+
+
+def test_paper_example():
+    # The A->B->C->A ring returns exactly what it takes, so no cycle
+    example_batch = [
+        Transaction("A", "B", 2, 0.5),
+        Transaction("B", "C", 1, 4),
+        Transaction("C", "A", 4, 0.5)
+    ]
+    exo = {"A": 1.0, "B": 1.0, "C": 1.0}
+    assert find_cycles(example_batch, exo, "A") == []
+
+    # Same ring with a generous C->A tx: pay A for C, C for B, B for A
+    example_batch[2] = Transaction("C", "A", 4, 0.4)
+    cycles = find_cycles(example_batch, exo, "A")
+    assert [c["cycle"] for c in cycles] == [["A", "C", "B", "A"]]
+    assert abs(cycles[0]["rate"] - 1.25) < 1e-12 and abs(cycles[0]["amount_in"] - 1.6) < 1e-12
+
+
+def best_cycle(best, start, allowed, max_hops):
+    # Best round-trip rate over every simple cycle through `start`, by brute force
+    rate = 0.0
+    for length in range(1, max_hops + 1):
+        for middle in itertools.permutations([a for a in allowed if a != start], length - 1):
+            hops = list(zip((start,) + middle, middle + (start,)))
+            if all(h in best for h in hops):
+                rate = max(rate, math.prod(best[h] for h in hops))
+    return rate
+
+
+def test_matches_brute_force():
+    # Exact up to 3 hops; longer searches only return real simple cycles, never better than the best
+    rng = random.Random(3)
+    for trial in range(200):
+        names = [f"T{i}" for i in range(rng.randint(2, 6))]
+        batch = [Transaction(rng.choice(names), rng.choice(names), rng.uniform(0.1, 5), rng.uniform(0.5, 2))
+                 for _ in range(rng.randint(0, 25))]
+        best = {}
+        for tx in batch:
+            if tx.src != tx.dst:
+                best[(tx.dst, tx.src)] = max(best.get((tx.dst, tx.src), 0), 1 / tx.r)
+
+        expected = best_cycle(best, "T0", names, 3)
+        cycles = find_cycles(batch, {}, "T0", max_length=3, budget=10)
+        got = max((c["rate"] for c in cycles), default=0.0)
+        assert abs(got - (expected if expected > 1 + MIN_GAIN else 0.0)) < 1e-9, trial
+
+        cycles = find_cycles(batch, {}, "T0", max_length=4, budget=10)
+        for c in cycles:
+            assert c["cycle"][0] == c["cycle"][-1] == "T0" and len(set(c["cycle"])) == len(c["cycle"]) - 1, trial
+            assert abs(c["rate"] - math.prod(1 / tx.r for tx in c["txs"])) < 1e-9 * c["rate"], trial
+        got = max((c["rate"] for c in cycles), default=0.0)
+        assert got <= best_cycle(best, "T0", names, 4) * (1 + 1e-12), trial
+
+
+def edge(u, v, rate):
+    # Searcher edge u -> v: filling a v -> u tx at 1/rate
+    return Transaction(v, u, 1.0, 1 / rate)
+
+
+def test_repeating_walk_does_not_hide_simple_cycle():
+    # X -> Y -> X is far more profitable than anything through T0, but a walk that
+    # repeats X must not take X's slot from T0 -> Z -> W -> X, which closes a real cycle
+    batch = [edge("T0", "X", 1.0), edge("X", "Y", 10.0), edge("Y", "X", 10.0),
+             edge("T0", "Z", 1.0), edge("Z", "W", 1.0), edge("W", "X", 1.1), edge("X", "T0", 1.0)]
+    cycles = find_cycles(batch, {}, "T0", max_length=4)
+    assert [c["cycle"] for c in cycles] == [["T0", "Z", "W", "X", "T0"]]
+    assert abs(cycles[0]["rate"] - 1.1) < 1e-12
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import time
+import pytest
+from mempool_ingest import RollingPool, poll_txpool, stream_pending, subscribe_pending
+
+A, B, C = "0x" + "aa" * 20, "0x" + "bb" * 20, "0x" + "cc" * 20
+
+
+def tx(sender, nonce, tx_hash):
+    return {"from": sender, "nonce": hex(nonce), "hash": tx_hash}
+
+
+def pending(*txs):
+    # txpool_content pending section
+    section = {}
+    for t in txs:
+        section.setdefault(t["from"], {})[str(int(t["nonce"], 16))] = t
+    return section
+
+
+def test_rolling_pool():
+    pool = RollingPool()
+    pool.add(tx(A, 1, "0x1"), None)
+    pool.add(tx(A, 2, "0x2"), time.monotonic())
+    pool.add(tx(A, 2, "0x2b"), time.monotonic())
+    pool.add(tx(B, 7, "0x3"), time.monotonic())
+    assert len(pool) == 3 and pool.replaced == 1 and len(pool.latencies) == 3
+    assert pool.evict_mined(A, 1) == 1 and set(pool.txs) == {(A, 2), (B, 7)}
+    pool.sync(pending(tx(B, 7, "0x3"), tx(C, 0, "0x4")), None)
+    assert set(pool.txs) == {(B, 7), (C, 0)}
+    assert pool.stale(time.monotonic() + pool.max_age + 1) == list(pool.last_seen)
+
+
+async def fake_http_node(responses):
+    # Serves txpool_content from `responses` in turn, repeating the last one
+    from aiohttp import web
+
+    polls = []
+
+    async def handle(request):
+        body = await request.json()
+        assert body["method"] == "txpool_content"
+        polls.append(time.monotonic())
+        section = responses[min(len(polls), len(responses)) - 1]
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": {"pending": section, "queued": {}}})
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{runner.addresses[0][1]}/", polls
+
+
+def test_poll_txpool_against_http_node():
+    responses = [pending(tx(A, 1, "0x1")), pending(tx(A, 1, "0x1"), tx(B, 1, "0x2")), pending(tx(B, 1, "0x2"))]
+
+    async def scenario():
+        runner, url, polls = await fake_http_node(responses)
+        pool = RollingPool()
+        poller = asyncio.create_task(poll_txpool(pool, url, interval=0.05))
+        try:
+            while len(polls) < 4:
+                await asyncio.sleep(0.01)
+        finally:
+            poller.cancel()
+            await runner.cleanup()
+        return pool, polls
+
+    pool, polls = asyncio.run(scenario())
+    # Mirrors the node: A's tx left the pool, B's is still pending
+    assert set(pool.txs) == {(B, 1)}
+    # First poll's txs have no known arrival; B's is measured from the poll before it
+    assert len(pool.latencies) == 1
+    assert pool.latencies[0] >= polls[1] - polls[0] - 0.01
+
+
+class FakeWsNode:
+    """eth_subscribe node: streams `txs`, then one head mining `mined`; `still_pending` answer
+    eth_getTransactionByHash with no block, everything else with null. A head hash of
+    "0xclose" drops the connection instead of answering."""
+
+    def __init__(self, txs, mined, still_pending, heads=("0xhead",)):
+        self.txs, self.mined, self.still_pending, self.heads = txs, mined, still_pending, heads
+        self.requests = []
+
+    async def handler(self, ws):
+        async for message in ws:
+            msg = json.loads(message)
+            self.requests.append(msg["method"])
+            if msg["method"] == "eth_subscribe":
+                await ws.send(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": msg["params"][0]}))
+                if msg["params"][0] == "newHeads":
+                    for t in self.txs:
+                        await ws.send(json.dumps({"method": "eth_subscription", "params": {"result": t}}))
+                    for head in self.heads:
+                        await ws.send(json.dumps({"method": "eth_subscription", "params": {"result": {"hash": head}}}))
+            elif msg["method"] == "eth_getBlockByHash":
+                if msg["params"][0] == "0xclose":
+                    await ws.close()
+                    return
+                block = {"transactions": self.mined}
+                await ws.send(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": block}))
+            elif msg["method"] == "eth_getTransactionByHash":
+                result = {"hash": msg["params"][0], "blockNumber": None} if msg["params"][0] in self.still_pending else None
+                await ws.send(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": result}))
+
+
+async def run_ws(node, pool, until):
+    # Runs subscribe_pending against `node` until `until(task)` holds (or 5s pass)
+    import websockets
+
+    async with websockets.serve(node.handler, "127.0.0.1", 0) as server:
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        task = asyncio.create_task(subscribe_pending(pool, url))
+        deadline = time.monotonic() + 5
+        try:
+            while not until(task) and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+        finally:
+            if not task.done():
+                task.cancel()
+        return await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), 5)
+
+
+def test_subscribe_rechecks_stale_txs():
+    # A's tx is mined; B's and C's were streamed once and are now stale: B is still
+    # pending at the node, C was dropped
+    node = FakeWsNode([tx(A, 1, "0x1"), tx(B, 1, "0x2"), tx(C, 1, "0x3")], mined=[tx(A, 1, "0x1")], still_pending={"0x2"})
+    pool = RollingPool(max_age=0.0)
+    asyncio.run(run_ws(node, pool, lambda task: node.requests.count("eth_getTransactionByHash") == 2 and len(pool) == 1))
+    assert set(pool.txs) == {(B, 1)} and pool.added == 3
+
+
+def test_subscribe_fails_pending_requests_when_socket_closes(capsys):
+    # The head fetch never gets its answer; it must fail instead of waiting forever
+    node = FakeWsNode([tx(A, 1, "0x1")], mined=[], still_pending=set(), heads=("0xclose",))
+    pool = RollingPool()
+    out = []
+
+    def failed(task):
+        out.append(capsys.readouterr().out)
+        return task.done() and "Block fetch failed for 0xclose" in "".join(out)
+
+    (outcome,) = asyncio.run(run_ws(node, pool, failed))
+    # The stream ending is an error, never a silent stop
+    assert "websocket closed" in "".join(out) and isinstance(outcome, ConnectionError)
+    assert set(pool.txs) == {(A, 1)}
+
+
+def test_subscribe_request_after_close_raises():
+    class Silent(FakeWsNode):
+        async def handler(self, ws):
+            await ws.recv()
+            await ws.close()
+
+    with pytest.raises(ConnectionError):
+        outcome = asyncio.run(run_ws(Silent([], [], set()), RollingPool(), lambda task: task.done()))
+        raise outcome[0]
+
+
+def test_stream_reconnects_after_close():
+    # Every connection streams one new tx and then closes cleanly
+    import websockets
+
+    connections = []
+
+    async def handler(ws):
+        connections.append(ws)
+        for _ in range(2):
+            msg = json.loads(await ws.recv())
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": msg["params"][0]}))
+        sent = tx(A, len(connections), f"0x{len(connections)}")
+        await ws.send(json.dumps({"method": "eth_subscription", "params": {"result": sent}}))
+        await ws.close()
+
+    async def scenario():
+        pool = RollingPool()
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            task = asyncio.create_task(stream_pending(pool, url, backoff=0.01, max_backoff=0.05))
+            deadline = time.monotonic() + 5
+            while len(pool) < 3 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            task.cancel()
+        return pool
+
+    pool = asyncio.run(scenario())
+    assert len(connections) >= 3 and {(A, 1), (A, 2), (A, 3)} <= set(pool.txs)
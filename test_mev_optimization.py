@@ -0,0 +1,243 @@
+import contextlib
+import io
+import random
+from transaction import Transaction, TransactionBatch
+from mev_optimization import (EPSILON, IncrementalOptimizer, _decide, _depth, amount_out, compute_batch,
+                              compute_batch_multi, cumulative_argmax, helper)
+
+
+# Original per-asset loop, kept as the reference compute_batch is checked against
+def reference_compute_batch(batch, exo, base_asset="A"):
+    assets = sorted({tx.src for tx in batch} | {tx.dst for tx in batch})
+    results = {}
+
+    for j in [a for a in assets if a != base_asset]:
+        print(f"Pair ({base_asset}, {j})")
+        # Forward direction tau_1 -> tau_j
+        fwd = []
+        for tx in [t for t in batch if t.src == base_asset and t.dst == j]:
+            if (
+                exo.get(tx.src, 0) <= 0
+                or exo.get(tx.dst, 0) <= 0
+            ):
+                print(
+                    f"Skipping unrealistic ratio {tx.src}->{tx.dst}: "
+                    f"src={exo.get(tx.src)}, dst={exo.get(tx.dst)}"
+                )
+                continue
+            fwd.append(tx)
+
+        fwd.sort(key=lambda x: x.r)
+        fwd_profits = [helper(tx.src, tx.dst, tx.q, tx.r, exo) for tx in fwd]
+        k1, profit1 = cumulative_argmax(fwd_profits)
+
+        # Reverse direction tau_j -> tau_1
+        rev = []
+        for tx in [t for t in batch if t.src == j and t.dst == base_asset]:
+            if (
+                exo.get(tx.src, 0) <= 0
+                or exo.get(tx.dst, 0) <= 0
+            ):
+                print(
+                    f"Skipping unrealistic ratio {tx.src}->{tx.dst}: "
+                    f"src={exo.get(tx.src)}, dst={exo.get(tx.dst)}"
+                )
+                continue
+            rev.append(tx)
+
+        rev.sort(key=lambda x: x.r)
+        rev_profits = [helper(tx.src, tx.dst, tx.q, tx.r, exo) for tx in rev]
+        k2, profit2 = cumulative_argmax(rev_profits)
+
+        if profit1 <= EPSILON and profit2 <= EPSILON:
+            decision = "Do nothing"
+            executed = []
+            total = 0.0
+
+        elif profit1 >= profit2 and profit1 > EPSILON:
+            decision = f"Execute {base_asset}->{j} and mediator ({j}->{base_asset})"
+            executed = fwd[: k1 + 1]
+            total = profit1
+
+            # Insert mediator batch
+            total_qty = sum(tx.q for tx in executed)
+            avg_rate = sum(tx.r * tx.q for tx in executed) / max(total_qty, 1e-12)
+            mediator = Transaction(j, base_asset, total_qty, 1 / avg_rate)
+            executed.append(mediator)
+
+        elif profit2 > EPSILON:
+            decision = f"Execute {j}->{base_asset} and mediator ({base_asset}->{j})"
+            executed = rev[: k2 + 1]
+            total = profit2
+
+            # Insert mediator batch
+            total_qty = sum(tx.q for tx in executed)
+            avg_rate = sum(tx.r * tx.q for tx in executed) / max(total_qty, 1e-12)
+            mediator = Transaction(base_asset, j, total_qty, 1 / avg_rate)
+            executed.append(mediator)
+        else:
+            decision = "Do nothing"
+            executed = []
+            total = 0.0
+
+        print(f"PROFIT1={profit1:.4f}, PROFIT2={profit2:.4f}")
+        print(f"Decision: {decision}")
+        print(f"Executed transactions: {executed}")
+        print("")
+
+        results[(base_asset, j)] = {
+            "decision": decision,
+            "profit": total,
+            "executed": executed
+        }
+
+    return results
+
+
+# Price impact against a scalar simulation of every prefix (pairs without a pool keep exo)
+def reference_price_impact(batch, prices, base, reserves):
+    expected = {}
+    for j in sorted({t.src for t in batch} | {t.dst for t in batch} | {base}):
+        if j == base:
+            continue
+        sides = []
+        for a, b in ((base, j), (j, base)):
+            txs = sorted((t for t in batch if t.src == a and t.dst == b
+                          and prices.get(a, 0) > 0 and prices.get(b, 0) > 0), key=lambda t: t.r)
+            depth_in, depth_out = _depth(reserves, a, b)
+            if not txs:
+                sides.append(([], -1, float('-inf')))
+            elif depth_in != depth_in:
+                sides.append((txs, *cumulative_argmax([helper(a, b, t.q, t.r, prices) for t in txs])))
+            else:
+                values, filled, owed = [], 0.0, 0.0
+                for t in txs:
+                    filled, owed = filled + t.q, owed + t.q * t.r
+                    values.append(prices[b] * (amount_out(filled, depth_in, depth_out) - owed))
+                k = values.index(max(values))
+                sides.append((txs, k, values[k]))
+        (fwd, k1, profit1), (rev, k2, profit2) = sides
+        decision, direction = _decide(base, j, profit1, profit2)
+        executed = [fwd[: k1 + 1], rev[: k2 + 1], []][2 if direction is None else direction]
+        expected[(base, j)] = {"decision": decision, "profit": [profit1, profit2, 0.0][2 if direction is None else direction],
+                               "executed": executed + [None]}
+    return expected
+
+
+def run(fn, batch, prices, base):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        res = fn(batch, prices, base)
+    return res, out.getvalue()
+
+
+def same(a, b):
+    # Identical results: same decisions, profits and executed txs
+    if a.keys() != b.keys():
+        return False
+    for key in a:
+        x, y = a[key], b[key]
+        if x["decision"] != y["decision"] or x["profit"] != y["profit"] or len(x["executed"]) != len(y["executed"]):
+            return False
+        for t, u in zip(x["executed"], y["executed"]):
+            if t is not u and (t.src, t.dst, t.q, t.r) != (u.src, u.dst, u.q, u.r):
+                return False
+    return True
+
+
+def close(a, b):
+    # Same decisions and executed txs, profits up to rounding; the mediator is rebuilt from the same txs
+    if a.keys() != b.keys():
+        return False
+    for key in a:
+        x, y = a[key], b[key]
+        if x["decision"] != y["decision"] or abs(x["profit"] - y["profit"]) > 1e-9 * max(1.0, abs(y["profit"])):
+            return False
+        if x["executed"][:-1] != y["executed"][:-1]:
+            return False
+    return True
+
+
+def test_paper_example():
+    example_batch = [
+        Transaction("A", "B", 2, 0.5),
+        Transaction("B", "C", 1, 4),
+        Transaction("C", "A", 4, 0.5)
+    ]
+    exo = {"A": 1.0, "B": 1.0, "C": 1.0}
+    assert same(run(compute_batch, example_batch, exo, "A")[0], run(reference_compute_batch, example_batch, exo, "A")[0])
+
+
+def test_compute_batch_matches_reference():
+    # Random batches with ties, bad prices and no txs, as lists and as TransactionBatches
+    rng = random.Random(11)
+    for trial in range(300):
+        names = [f"T{i}" for i in range(rng.randint(1, 8))]
+        prices = {a: rng.choice([rng.uniform(0.1, 10), 1.0, 0, -1]) for a in names if rng.random() < 0.9}
+        batch = [
+            Transaction(rng.choice(names), rng.choice(names), rng.choice([rng.uniform(0, 5), rng.randint(1, 9)]),
+                        rng.choice([rng.uniform(0.01, 3), 0.5, 1.0]))
+            for _ in range(rng.randint(0, 60))
+        ]
+        base = rng.choice(names)
+        (fast, fast_out), (slow, slow_out) = run(compute_batch, batch, prices, base), run(reference_compute_batch, batch, prices, base)
+        assert same(fast, slow) and fast_out == slow_out, trial
+        # Columnar input (q and r are stored as floats, so compare with a float copy)
+        floats = [Transaction(t.src, t.dst, float(t.q), float(t.r)) for t in batch]
+        columnar, columnar_out = run(compute_batch, TransactionBatch.from_transactions(floats), prices, base)
+        slow, slow_out = run(reference_compute_batch, floats, prices, base)
+        assert same(columnar, slow) and columnar_out == slow_out, trial
+
+        # Multi-base: each base gets the reference results minus pairs owned by earlier bases
+        bases = rng.sample(names, rng.randint(1, len(names)))
+        multi = compute_batch_multi(batch, prices, bases, verbose=False)
+        expected = {}
+        for n, b in enumerate(bases):
+            ref, _ = run(reference_compute_batch, batch, prices, b)
+            expected.update({k: v for k, v in ref.items() if k[1] not in bases[:n]})
+        assert same(multi, expected), trial
+
+
+def test_incremental_optimizer_matches_full_recompute():
+    # Full recomputation after every add/remove/price move
+    rng = random.Random(12)
+    for trial in range(30):
+        names = [f"T{i}" for i in range(rng.randint(2, 6))]
+        prices = {a: rng.uniform(0.1, 10) for a in names if rng.random() < 0.9}
+        bases = rng.sample(names, rng.randint(1, 2))
+        live = IncrementalOptimizer(prices, bases)
+        pool = {}
+        for step in range(200):
+            action = rng.random()
+            if action < 0.6 or not pool:
+                tx = Transaction(rng.choice(names), rng.choice(names), rng.uniform(0.01, 5), rng.uniform(0.01, 3), f"0x{step:x}")
+                live.add(tx)
+                pool[tx.tx_hash] = tx
+            elif action < 0.9:
+                tx_hash = rng.choice(list(pool))
+                live.remove(tx_hash)
+                del pool[tx_hash]
+            else:
+                token, usd = rng.choice(names), rng.choice([rng.uniform(0.1, 10), 0])
+                live.update_price(token, usd)
+                prices[token] = usd
+            assert close(live.results(), compute_batch_multi(list(pool.values()), prices, bases, verbose=False)), (trial, step)
+
+
+def test_price_impact_matches_scalar_simulation():
+    # Some pairs have no pool and keep the exo valuation
+    rng = random.Random(13)
+    for trial in range(200):
+        names = [f"T{i}" for i in range(rng.randint(2, 6))]
+        prices = {a: rng.uniform(0.1, 10) for a in names if rng.random() < 0.9}
+        batch = [Transaction(rng.choice(names), rng.choice(names), rng.uniform(0.01, 5), rng.uniform(0.01, 3))
+                 for _ in range(rng.randint(0, 60))]
+        depths = {}
+        for a in names:
+            for b in names:
+                if a < b and rng.random() < 0.7:
+                    depth = rng.choice([1, 10, 1000])
+                    depths[(a, b)] = (depth * prices.get(b, 1), depth * prices.get(a, 1))
+        base = rng.choice(names)
+        got = compute_batch(batch, prices, base, verbose=False, reserves=depths)
+        assert close(got, reference_price_impact(batch, prices, base, depths)), trial
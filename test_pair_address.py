@@ -0,0 +1,23 @@
+import pytest
+import pair_address
+from pair_address import DEXES, pair_for, sort_tokens
+
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+USDT = "0xdAC17F958D2ee523a2206206994597C13D831ec7"
+
+
+def test_known_mainnet_pairs():
+    assert pair_for(WETH, USDC) == pair_for(USDC, WETH) == "0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc"
+    assert pair_for(WETH, USDT) == "0x0d4a11d5EEaaC28EC3F61d100daF4d40471f1852"
+    assert pair_for(WETH, USDC, DEXES["uniswap_v2"]) == pair_for(WETH, USDC)
+    assert sort_tokens(WETH, USDC) == (USDC.lower(), WETH.lower())
+
+
+def test_dex_from_env_needs_factory_and_hash_together(monkeypatch):
+    monkeypatch.delenv("PAIR_INIT_CODE_HASH", raising=False)
+    monkeypatch.setenv("PAIR_FACTORY", DEXES["uniswap_v2"][0])
+    with pytest.raises(ValueError):
+        pair_address.dex_from_env()
+    monkeypatch.setenv("PAIR_INIT_CODE_HASH", DEXES["uniswap_v2"][1])
+    assert pair_address.dex_from_env() == DEXES["uniswap_v2"]
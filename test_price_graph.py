@@ -0,0 +1,34 @@
+from price_graph import DAI, USDC, WETH, PriceGraph, candidate_pairs
+
+X, Y = "0x" + "11" * 20, "0x" + "22" * 20
+
+
+def toy_graph():
+    # X only trades against DAI; Y has a thin direct USDC pool and a deep WETH pool
+    decimals = {USDC: 6, DAI: 18, WETH: 18, X: 18, Y: 18}
+    reserves = {
+        (WETH, USDC): (1000 * 10**18, 3_000_000 * 10**6),
+        (DAI, USDC): (5_000_000 * 10**18, 5_000_000 * 10**6),
+        (X, DAI): (100 * 10**18, 200 * 10**18),
+        (Y, USDC): (1 * 10**18, 10 * 10**6),
+        (Y, WETH): (30_000 * 10**18, 20 * 10**18),
+    }
+    return PriceGraph(reserves, decimals)
+
+
+def test_prices_follow_widest_path():
+    graph = toy_graph()
+    assert abs(graph.price(WETH) - 3000) < 1e-9
+    assert abs(graph.price(X) - 2.0) < 1e-9 and graph.path(X) == [USDC, DAI, X]
+    assert abs(graph.price(Y) - 2.0) < 1e-9 and graph.path(Y) == [USDC, WETH, Y]
+
+
+def test_unreachable_token_has_no_price():
+    graph = toy_graph()
+    assert graph.price("0x" + "33" * 20) is None and "0x" + "33" * 20 not in graph
+
+
+def test_candidate_pairs():
+    # Hubs among themselves, then X against every hub; WETH is a hub already
+    pairs = candidate_pairs([X, WETH])
+    assert len(pairs) == 6 + 4 and (WETH, USDC) in pairs and (X, DAI) in pairs
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import mempool_onchain_snapshot
+import rpc_pool
+from rpc_pool import RpcPool, RpcPoolError
+
+RESULT = {"jsonrpc": "2.0", "id": 1, "result": {"pending": {}, "queued": {}}}
+
+
+@pytest.fixture
+def node():
+    # Local endpoints: /limited answers 429, /error 500, /slow after 1.5s, anything else at once
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            hits.append(self.path)
+            if self.path in ("/limited", "/error"):
+                self.send_response(429 if self.path == "/limited" else 500)
+                self.send_header("Retry-After", "99999")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.path == "/slow":
+                time.sleep(1.5)
+            body = json.dumps(RESULT).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", hits
+    server.shutdown()
+
+
+def test_fails_over_on_rate_limit_and_server_error(node):
+    base, hits = node
+    pool = RpcPool([base + "/limited", base + "/error", base + "/ok"])
+    assert json.loads(pool.post(b"{}")) == RESULT
+    assert hits == ["/limited", "/error", "/ok"]
+    # Retry-After is capped
+    assert pool.endpoints[0].down_until - time.monotonic() <= rpc_pool.MAX_RETRY_AFTER
+
+
+def test_read_timeout_gives_up_only_when_asked(node):
+    base, hits = node
+    pool = RpcPool([base + "/slow", base + "/ok"], timeout=0.5)
+    with pytest.raises(RpcPoolError):
+        pool.post(b"{}", retry_read_timeout=False)
+    assert hits == ["/slow"]
+    # By default a timeout fails over like any other error (the slow endpoint is cooling down)
+    pool.endpoints[0].down_until = 0
+    assert json.loads(pool.post(b"{}")) == RESULT and hits[-1] == "/ok"
+
+
+def test_fetch_txpool_fails_over(node, monkeypatch):
+    base, hits = node
+    monkeypatch.setenv("RPC_PROBES", "0")
+    monkeypatch.setattr(mempool_onchain_snapshot, "ENDPOINT_URL", base + "/limited")
+    monkeypatch.setattr(mempool_onchain_snapshot, "TXPOOL_URLS", [base + "/error", base + "/ok"])
+    assert mempool_onchain_snapshot.fetch_txpool() == RESULT
+    assert hits == ["/limited", "/error", "/ok"]
+
+
+def test_fetch_txpool_does_not_restart_slow_download(node, monkeypatch):
+    base, hits = node
+    monkeypatch.setenv("RPC_PROBES", "0")
+    monkeypatch.setattr(mempool_onchain_snapshot, "ENDPOINT_URL", base + "/slow")
+    monkeypatch.setattr(mempool_onchain_snapshot, "TXPOOL_URLS", [base + "/ok"])
+    monkeypatch.setattr(mempool_onchain_snapshot, "TXPOOL_TIMEOUT", 0.5)
+    with pytest.raises(RpcPoolError):
+        mempool_onchain_snapshot.fetch_txpool()
+    assert hits == ["/slow"]
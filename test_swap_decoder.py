@@ -0,0 +1,46 @@
+import random
+from swap_decoder import _LAYOUTS, _WORD, decode_args
+
+
+def reference_decode(selector, payload):
+    # Generic path used before the fast decoder existed
+    from eth_abi import decode
+
+    entry, types, _ = _LAYOUTS[selector]
+    return decode(types, bytes.fromhex(payload))
+
+
+def outcome(fn, selector, payload):
+    try:
+        return fn(selector, payload)
+    except Exception as e:
+        return type(e).__name__
+
+
+def test_fast_decoder_matches_eth_abi():
+    from eth_abi import encode
+
+    rng = random.Random(7)
+
+    def random_address():
+        return "0x" + rng.randbytes(20).hex()
+
+    for selector, (entry, types, n_uints) in _LAYOUTS.items():
+        for _ in range(300):
+            args = [rng.getrandbits(rng.choice([8, 64, 256])) for _ in range(n_uints)]
+            args += [[random_address() for _ in range(rng.randint(0, 5))], random_address(), rng.getrandbits(64)]
+            payload = encode(types, args).hex()
+
+            # Valid calldata plus a few corruptions: truncation, trailing bytes, dirty padding
+            variants = [payload, payload[:-_WORD], payload + "00" * 32, payload[:-2]]
+            dirty = list(payload)
+            dirty[(n_uints + 1) * _WORD] = "f"
+            variants.append("".join(dirty))
+            bumped = list(payload)
+            bumped[n_uints * _WORD + 62] = "c"
+            variants.append("".join(bumped))
+
+            for variant in variants:
+                fast = outcome(decode_args, selector, variant)
+                slow = outcome(reference_decode, selector, variant)
+                assert fast == slow, (entry["name"], variant, fast, slow)
@@ -0,0 +1,75 @@
+import json
+import os
+import pytest
+from txpool_stream import iter_txpool, load_filtered
+
+ROUTER = "0x7a250d5630b4cf539739df2c5dacb4c659f2488d"
+
+# Escapes, raw unicode, nested objects/arrays and every scalar type, in keys and values,
+# with decoy sections and structural characters inside strings around the pending section
+DUMP = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "note": {"text": 'skip me {"pending": [1, 2]} \\" \\\\', "list": [[], {}, [{"a": None}]], "ok": True},
+    "result": {
+        "queued": {"0xq": {"0": {"to": ROUTER, "input": "0x", "nested": {"x": [1, 2.5e-3, False]}}}},
+        "pending": {
+            "0xaaaa": {
+                "5": {"to": ROUTER, "input": "0x38ed1739", "memo": 'quote " backslash \\ newline \n tab \t',
+                      "accessList": [{"address": "0x01", "storageKeys": ["0x02", "0x03"]}], "v": None},
+                "6": {"to": "0x" + "11" * 20, "input": "0xdeadbeef", "chainId": 1, "yParity": True},
+            },
+            "0xbé漢": {
+                "0": {"to": ROUTER.upper().replace("0X", "0x"), "unicode": "café 漢字 \U0001F600",
+                      "escaped": "\\u00e9 \\ud83d", "deep": {"a": {"b": {"c": [[["}"]]]}}}},
+            },
+            "0xempty\"key": {},
+        },
+        "trailer": ["}", "]", "{"],
+    },
+}
+
+
+def expected(dump, addresses=None):
+    wanted = {a.lower() for a in addresses} if addresses else None
+    return [(sender, nonce, tx) for sender, txs in dump["result"]["pending"].items() for nonce, tx in txs.items()
+            if wanted is None or tx.get("to", "").lower() in wanted]
+
+
+@pytest.fixture(params=[{}, {"indent": 2}, {"ensure_ascii": False}, {"separators": (",", ":")}],
+                ids=["default", "indented", "raw-unicode", "compact"])
+def dump_path(request, tmp_path):
+    path = tmp_path / "sample.dump"
+    path.write_bytes(json.dumps(DUMP, **request.param).encode())
+    return path
+
+
+def test_every_chunk_size_matches_json_load(dump_path):
+    with open(dump_path, "rb") as f:
+        reference = json.load(f)
+    assert reference == DUMP
+    size = dump_path.stat().st_size
+    for chunk_size in range(1, size + 2):
+        assert list(iter_txpool(dump_path, chunk_size=chunk_size)) == expected(reference), chunk_size
+        assert list(iter_txpool(dump_path, {ROUTER}, chunk_size=chunk_size)) == expected(reference, {ROUTER}), chunk_size
+
+
+def test_load_filtered(dump_path):
+    assert load_filtered(dump_path, [ROUTER.upper().replace("0X", "0x")]) == [tx for _, _, tx in expected(DUMP, {ROUTER})]
+
+
+def test_truncated_dump_raises(tmp_path):
+    raw = json.dumps(DUMP, ensure_ascii=False).encode()
+    start = raw.index(b'"pending"')
+    end = raw.index(b'"trailer"')
+    path = tmp_path / "truncated.dump"
+    # Cuts on either side of every structural byte in the pending section (mid-key,
+    # mid-string, mid-escape, between entries) fail loudly instead of yielding a partial pool
+    cuts = sorted({i + d for i in range(start, end) if raw[i:i + 1] in b'{}[]":,\\' for d in (0, 1)})
+    # Written once and shortened in place (cheaper than a file per cut)
+    path.write_bytes(raw[:end])
+    for cut in reversed(cuts):
+        os.truncate(path, cut)
+        for chunk_size in (1, 7, 1 << 20):
+            with pytest.raises(ValueError):
+                list(iter_txpool(path, chunk_size=chunk_size))
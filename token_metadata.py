@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import time
+from multicall import aggregate3
+
+# Bulk ERC20 metadata resolution.
+# Every unique address is resolved once: first from the in-process memo, then from the
+# on-disk cache, and only the remaining misses go out as a handful of Multicall3 requests
+# instead of three eth_calls each. symbol/name/decimals never change, so hits are kept
+# forever; calls that reverted are remembered too (negative caching) so broken tokens
+# don't cost a round trip on every run. RPC failures (timeouts, refused connections)
+# raise out of resolve_tokens instead, so an outage is retried on the next run.
+
+SYMBOL_CALL = bytes.fromhex("95d89b41")    # symbol()
+NAME_CALL = bytes.fromhex("06fdde03")      # name()
+DECIMALS_CALL = bytes.fromhex("313ce567")  # decimals()
+
+CACHE_PATH = os.getenv("TOKEN_CACHE_PATH", "token_cache.sqlite")
+# Failed lookups are retried after this long in case the failure was transient
+NEGATIVE_TTL = 7 * 24 * 3600
+
+# Bits in the `failed` column
+FAILED_SYMBOL = 1
+FAILED_NAME = 2
+FAILED_DECIMALS = 4
+
+# checksum address -> metadata dict
+_memo = {}
+_cache = None
+
+
+class TokenCache:
+    """SQLite-backed metadata store keyed by checksum address."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            "address TEXT PRIMARY KEY, symbol TEXT, name TEXT, decimals INTEGER, "
+            "failed INTEGER NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, addresses, now=None):
+        """Returns {address: (symbol, name, decimals)} for cached, non-expired entries."""
+        now = time.time() if now is None else now
+        found = {}
+        addresses = list(addresses)
+        for start in range(0, len(addresses), 500):
+            chunk = addresses[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT address, symbol, name, decimals, failed, fetched_at FROM tokens "
+                f"WHERE address IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for address, symbol, name, decimals, failed, fetched_at in rows:
+                if failed and now - fetched_at > NEGATIVE_TTL:
+                    continue
+                found[address] = (symbol, name, decimals)
+        return found
+
+    def put_many(self, entries, now=None):
+        """Stores (address, symbol, name, decimals) tuples; None fields are cached as failures."""
+        now = time.time() if now is None else now
+        rows = []
+        for address, symbol, name, decimals in entries:
+            failed = (
+                (FAILED_SYMBOL if symbol is None else 0)
+                | (FAILED_NAME if name is None else 0)
+                | (FAILED_DECIMALS if decimals is None else 0)
+            )
+            rows.append((address, symbol, name, decimals, failed, now))
+        self.conn.executemany("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+
+
+def get_cache():
+    """Shared on-disk cache, opened on first use."""
+    global _cache
+    if _cache is None:
+        _cache = TokenCache()
+    return _cache
+
+
+def set_cache(cache):
+    """Swaps the on-disk cache (e.g. a TokenCache on another path, or ':memory:')."""
+    global _cache
+    _cache = cache
+    _memo.clear()
+
+
+def _decode_text(ok, data):
+    # string per the ERC20 ABI, or bytes32 for older tokens like MKR
+    if not ok or not data:
+        return None
+    from eth_abi import decode
+
+    try:
+        return decode(["string"], data)[0]
+    except Exception:
+        pass
+    if len(data) == 32:
+        return data.split(b"\x00", 1)[0].decode(errors="ignore")
+    return None
+
+
+def _decode_decimals(ok, data):
+    if not ok or len(data) < 32:
+        return None
+    value = int.from_bytes(data[:32], "big")
+    # uint8 return values are padded to a word; anything larger is garbage
+    return value if value < 256 else None
+
+
+def _describe(addr, symbol, name, decimals):
+    return {
+        "address": addr,
+        "symbol": symbol or "UNKNOWN",
+        "name": name or "UNKNOWN",
+        "decimals": decimals,
+    }
+
+
+def decode_fields(symbol_result, name_result, decimals_result):
+    """(symbol, name, decimals) from the (success, returndata) of the three calls."""
+    return _decode_text(*symbol_result), _decode_text(*name_result), _decode_decimals(*decimals_result)
+
+
+def cached_tokens(checksummed):
+    """Returns {checksum address: metadata} for the addresses known without a node."""
+    wanted = list(dict.fromkeys(cs for cs in checksummed if cs not in _memo))
+    if wanted:
+        for addr, fields in get_cache().get_many(wanted).items():
+            _memo[addr] = _describe(addr, *fields)
+    return {cs: _memo[cs] for cs in checksummed if cs in _memo}
+
+
+def remember(fetched):
+    """Caches freshly fetched (checksum address, symbol, name, decimals) tuples."""
+    for addr, *fields in fetched:
+        _memo[addr] = _describe(addr, *fields)
+    get_cache().put_many(fetched)
+
+
+def resolve_tokens(w3, addresses):
+    """Returns {checksum address: metadata} for `addresses`, failing per token like safe_call."""
+    from web3 import Web3
+
+    checksummed = [Web3.to_checksum_address(a) for a in addresses]
+    cached = cached_tokens(checksummed)
+    wanted = list(dict.fromkeys(cs for cs in checksummed if cs not in cached))
+
+    if wanted:
+        calls = []
+        for addr in wanted:
+            calls += [(addr, SYMBOL_CALL), (addr, NAME_CALL), (addr, DECIMALS_CALL)]
+        results = aggregate3(w3, calls)
+        remember([(addr, *decode_fields(*results[3 * i:3 * i + 3])) for i, addr in enumerate(wanted)])
+
+    return {cs: _memo[cs] for cs in checksummed}
+
+
+def describe_token(w3, addr):
+    """Single-token convenience wrapper over `resolve_tokens`."""
+    return next(iter(resolve_tokens(w3, [addr]).values()))
@@ -1,50 +1,69 @@
 import json
 import os
-from web3 import Web3
 from typing import Dict
+from multicall import RPC_STATS, aggregate3
+from pair_address import DEX, pair_for, sort_tokens
+from reserve_cache import ReserveCache
+from token_metadata import describe_token, resolve_tokens
 
-# Connect to an Ethereum RPC endpoint (Infura preferred, fallback to QuickNode)
+# Ethereum RPC endpoints (QuickNode and Infura, plus any listed in RPC_URLS)
 PRIMARY_RPC = os.getenv("INFURA_URL")
 SECONDARY_RPC = os.getenv("QUICKNODE_ENDPOINT")
 
-# Prefer QuickNode first to avoid intermittent Infura DNS/rate issues, then fall back to Infura
-rpc_candidates = [u for u in [SECONDARY_RPC, PRIMARY_RPC] if u]
+# Connected lazily on first use so importing this module never touches the network
 w3 = None
 RPC_URL = None
 
-for uri in rpc_candidates:
-    try:
-        provider = Web3.HTTPProvider(uri, request_kwargs={"timeout": 20})
-        candidate = Web3(provider)
-        if candidate.is_connected():
-            w3 = candidate
-            RPC_URL = uri
-            break
-    except Exception:
-        continue
-
-if w3 is None or not w3.is_connected():
-    raise RuntimeError("No Ethereum RPC reachable. Set INFURA_URL or QUICKNODE_ENDPOINT.")
-
-# Uniswap V2 Router and Factory addresses
-UNISWAP_FACTORY = Web3.to_checksum_address("0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f")
-WETH_ADDRESS = Web3.to_checksum_address("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2")
-
-# Uniswap Factory ABI (minimal for fetching pair addresses)
-FACTORY_ABI = [
-    {
-        "constant": True,
-        "inputs": [
-            {"internalType": "address", "name": "", "type": "address"},
-            {"internalType": "address", "name": "", "type": "address"},
-        ],
-        "name": "getPair",
-        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-        "payable": False,
-        "stateMutability": "view",
-        "type": "function",
-    }
-]
+
+def connect():
+    """Returns a Web3 client over the shared RPC pool and the URL it currently prefers."""
+    from rpc_pool import get_pool, make_web3
+
+    # All endpoints stay in play: requests go to the fastest healthy one and fail over on 429/5xx
+    pool = get_pool()
+    return make_web3(pool), pool.ranked()[0].url
+
+
+def get_w3():
+    """Shared client, connected on first call."""
+    global w3, RPC_URL
+    if w3 is None:
+        w3, RPC_URL = connect()
+    return w3
+
+
+def set_w3(client, url=None):
+    """Injects a client (e.g. a local node or a test double) instead of connecting."""
+    global w3, RPC_URL
+    w3, RPC_URL = client, url
+
+
+def _checksum(addr):
+    from web3 import Web3
+
+    return Web3.to_checksum_address(addr)
+
+
+# Pair deployment (factory, init code hash) prices are read from; Uniswap V2 unless
+# PAIR_DEX or PAIR_FACTORY + PAIR_INIT_CODE_HASH select another
+UNISWAP_DEX = DEX
+WETH_ADDRESS = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+USDC_ADDRESS = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+
+# Raw calldata for the bulk (Multicall3) path
+GET_RESERVES_CALL = bytes.fromhex("0902f1ac")  # getReserves()
+
+# Reserves by (pair, block number), shared by every pricing run in this process
+reserve_cache = ReserveCache()
+
+# Sidecar to exo.json with the block it was priced at and every reserve read for it, so
+# later steps (run_mev_analysis with PRICE_IMPACT=1) reuse the same reads at the same block
+RESERVES_FILE = "exo_reserves.json"
+
+# Price through the multi-hop liquidity graph (price_graph) instead of WETH then USDC pairs
+GRAPH_PRICING = os.getenv("GRAPH_PRICING") == "1"
+# block number -> (tokens covered, PriceGraph, decimals); only the latest block is kept
+_graphs = {}
 
 # Uniswap Pair ABI (minimal subset)
 PAIR_ABI = [
@@ -66,144 +85,272 @@ PAIR_ABI = [
 ]
 
 
-# Minimal ERC20 ABI for decimals
-ERC20_ABI = [
-    {
-        "constant": True,
-        "inputs": [],
-        "name": "decimals",
-        "outputs": [{"name": "", "type": "uint8"}],
-        "payable": False,
-        "stateMutability": "view",
-        "type": "function",
-    }
-]
+def _price(reserve_token, reserve_quote, token_decimals, quote_decimals):
+    # price = (quote_reserve / 10^quote_decimals) / (token_reserve / 10^token_decimals)
+    return (reserve_quote / (10 ** quote_decimals)) / (reserve_token / (10 ** token_decimals))
+
 
 def get_decimals(token_address: str) -> int:
-    try:
-        erc20 = w3.eth.contract(address=token_address, abi=ERC20_ABI)
-        return erc20.functions.decimals().call()
-    except Exception:
+    # Served from the shared token metadata cache; only unknown tokens hit the RPC
+    decimals = describe_token(get_w3(), token_address)["decimals"]
+    if decimals is None:
         # Default to 18 if decimals call fails
         return 18
+    return decimals
 
 
-def fetch_token_price_in_weth(token_address: str) -> float:
-    """Fetches token price in WETH from Uniswap V2"""
-    factory = w3.eth.contract(address=UNISWAP_FACTORY, abi=FACTORY_ABI)
-    pair_address = factory.functions.getPair(token_address, WETH_ADDRESS).call()
+def _orient(reserves, token_address, quote_address):
+    # (reserve0, reserve1) -> (reserve_token, reserve_quote)
+    if reserves is None:
+        return None
+    if sort_tokens(token_address, quote_address)[0] == token_address.lower():
+        return reserves[0], reserves[1]
+    return reserves[1], reserves[0]
 
-    if pair_address == "0x0000000000000000000000000000000000000000":
-        print(f"No Uniswap pair found for {token_address}")
+
+def fetch_reserves(token_address: str, quote_address: str, block_identifier="latest"):
+    """Returns (reserve_token, reserve_quote) for the token/quote pair, or None if it doesn't exist.
+
+    The pair address and token0 come from CREATE2 derivation, so this is a single getReserves,
+    or none if the pair was already read at the same block.
+    """
+    from web3.exceptions import BadFunctionCallOutput
+
+    if token_address.lower() == quote_address.lower():
+        # A token can't be paired with itself (getPair returns the zero address)
         return None
+    pair_address = pair_for(token_address, quote_address, UNISWAP_DEX)
+    cached = reserve_cache.get_many(block_identifier, [pair_address])
+    if pair_address in cached:
+        return _orient(cached[pair_address], token_address, quote_address)
 
-    pair_contract = w3.eth.contract(address=pair_address, abi=PAIR_ABI)
-    token0 = pair_contract.functions.token0().call()
-    token1 = pair_contract.functions.token1().call()
-    reserves = pair_contract.functions.getReserves().call()
+    pair_contract = get_w3().eth.contract(address=pair_address, abi=PAIR_ABI)
+    try:
+        reserves = tuple(pair_contract.functions.getReserves().call(block_identifier=block_identifier)[:2])
+    except BadFunctionCallOutput:
+        # Nothing deployed at the derived address: the factory never created this pair
+        reserves = None
+    reserve_cache.put_many(block_identifier, {pair_address: reserves})
+    return _orient(reserves, token_address, quote_address)
 
-    if token0.lower() == token_address.lower():
-        reserve_token, reserve_weth = reserves[0], reserves[1]
-    else:
-        reserve_token, reserve_weth = reserves[1], reserves[0]
 
+def fetch_token_price_in_weth(token_address: str, block_identifier="latest") -> float:
+    """Fetches token price in WETH from Uniswap V2"""
+    reserves = fetch_reserves(token_address, WETH_ADDRESS, block_identifier)
+    if reserves is None:
+        print(f"No Uniswap pair found for {token_address}")
+        return None
+
+    reserve_token, reserve_weth = reserves
     if reserve_token == 0 or reserve_weth == 0:
         return None
 
     token_decimals = get_decimals(token_address)
     weth_decimals = 18
     # price_in_weth = (WETH_reserve / 10^18) / (token_reserve / 10^decimals)
-    price_in_weth = (reserve_weth / (10 ** weth_decimals)) / (reserve_token / (10 ** token_decimals))
-    return price_in_weth
+    return _price(reserve_token, reserve_weth, token_decimals, weth_decimals)
 
 
-def fetch_token_price_in_usdc(token_address: str) -> float:
+def fetch_token_price_in_usdc(token_address: str, block_identifier="latest") -> float:
     """Fetch token price directly in USDC from Uniswap V2 (fallback when no WETH pair)."""
-    USDC = Web3.to_checksum_address("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48")
-    factory = w3.eth.contract(address=UNISWAP_FACTORY, abi=FACTORY_ABI)
-    pair_address = factory.functions.getPair(token_address, USDC).call()
-
-    if pair_address == "0x0000000000000000000000000000000000000000":
+    reserves = fetch_reserves(token_address, USDC_ADDRESS, block_identifier)
+    if reserves is None:
         return None
 
-    pair_contract = w3.eth.contract(address=pair_address, abi=PAIR_ABI)
-    token0 = pair_contract.functions.token0().call()
-    reserves = pair_contract.functions.getReserves().call()
-
-    # Determine which reserve corresponds to token vs USDC
-    if token0.lower() == token_address.lower():
-        reserve_token, reserve_usdc = reserves[0], reserves[1]
-    else:
-        reserve_token, reserve_usdc = reserves[1], reserves[0]
-
+    # Reserves come back ordered as (token, USDC)
+    reserve_token, reserve_usdc = reserves
     if reserve_token == 0 or reserve_usdc == 0:
         return None
 
     token_decimals = get_decimals(token_address)
     usdc_decimals = 6
     # price_in_usdc = (USDC_reserve / 10^6) / (token_reserve / 10^decimals)
-    price_in_usdc = (reserve_usdc / (10 ** usdc_decimals)) / (reserve_token / (10 ** token_decimals))
-    return price_in_usdc
-
+    return _price(reserve_token, reserve_usdc, token_decimals, usdc_decimals)
 
-def fetch_weth_usd() -> float:
-    """Fetches WETH/USD from Uniswap V2 stable pair (WETH/USDC)"""
-    USDC = Web3.to_checksum_address("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48")
-    factory = w3.eth.contract(address=UNISWAP_FACTORY, abi=FACTORY_ABI)
-    pair_address = factory.functions.getPair(WETH_ADDRESS, USDC).call()
 
-    if pair_address == "0x0000000000000000000000000000000000000000":
+def fetch_weth_usd(block_identifier="latest") -> float:
+    """Fetches WETH/USD from Uniswap V2 stable pair (WETH/USDC); cached per block once pinned"""
+    reserves = fetch_reserves(WETH_ADDRESS, USDC_ADDRESS, block_identifier)
+    if reserves is None:
         raise ValueError("No WETH/USDC pair found")
 
-    pair_contract = w3.eth.contract(address=pair_address, abi=PAIR_ABI)
-    token0 = pair_contract.functions.token0().call()
-    reserves = pair_contract.functions.getReserves().call()
-
-    if token0.lower() == WETH_ADDRESS.lower():
-        reserve_weth, reserve_usdc = reserves[0], reserves[1]
-    else:
-        reserve_weth, reserve_usdc = reserves[1], reserves[0]
-
+    reserve_weth, reserve_usdc = reserves
     # Normalize reserves by token decimals to compute USD per WETH
     usdc_decimals = 6
     weth_decimals = 18
-    return (reserve_usdc / (10 ** usdc_decimals)) / (reserve_weth / (10 ** weth_decimals))
+    return _price(reserve_weth, reserve_usdc, weth_decimals, usdc_decimals)
+
+
+def fetch_pair_reserves(pairs, client=None, block_identifier="latest"):
+    """Returns {(token, quote): (reserve_token, reserve_quote)} for every pair that exists.
+
+    Pair addresses are derived locally, so all pairs not already cached for the block go
+    out in one aggregated getReserves round. Pairs with no code (never created) or that
+    revert are left out.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    addresses = {key: pair_for(*key, UNISWAP_DEX) for key in pairs}
+    raw_reserves = reserve_cache.get_many(block_identifier, addresses.values())
+    missing = [a for a in dict.fromkeys(addresses.values()) if a not in raw_reserves]
+
+    fetched = {}
+    # Fully cached blocks (e.g. published by a ReserveTracker) need no client at all
+    calls = [(a, GET_RESERVES_CALL) for a in missing]
+    results = aggregate3(client or get_w3(), calls, block_identifier=block_identifier) if calls else []
+    for pair_address, (ok, raw) in zip(missing, results):
+        # Calls to an address without code succeed with empty return data
+        if not ok or len(raw) < 64:
+            fetched[pair_address] = None
+        else:
+            fetched[pair_address] = (int.from_bytes(raw[:32], "big"), int.from_bytes(raw[32:64], "big"))
+    reserve_cache.put_many(block_identifier, fetched)
+    raw_reserves.update(fetched)
 
+    reserves = {}
+    for key, pair_address in addresses.items():
+        oriented = _orient(raw_reserves[pair_address], *key)
+        if oriented is not None:
+            reserves[key] = oriented
+    return reserves
 
-def build_exo_price_map(token_addresses: Dict[str, str]):
-    """Creates and saves exo.json with prices derived from Uniswap"""
-    weth_usd = fetch_weth_usd()
-    exo = {}
 
+def fetch_pool_depths(pairs, decimals, block_identifier="latest", client=None):
+    """Returns {(token_a, token_b): (reserve_a, reserve_b)} in token units for every funded pair.
+
+    Input for price-impact simulation in `mev_optimization`; `decimals` maps token -> int
+    (18 when missing). Served from the reserve cache when the block was already read.
+    """
+    depths = {}
+    for (a, b), (reserve_a, reserve_b) in fetch_pair_reserves(pairs, client, block_identifier).items():
+        if reserve_a and reserve_b:
+            depths[(a, b)] = (reserve_a / 10 ** decimals.get(a, 18), reserve_b / 10 ** decimals.get(b, 18))
+    return depths
+
+
+def _iter_tokens(token_addresses):
+    # (symbol, address) pairs, unwrapping nested token info dicts
     for symbol, address in token_addresses.items():
-        # Handle nested token info dicts
         if isinstance(address, dict):
             address = address.get("address")
             if not address:
                 print(f"Skipping {symbol}: no valid address field")
                 continue
+        yield symbol, address
 
-        cs_addr = Web3.to_checksum_address(address)
+
+def _sequential_prices(entries, block_identifier):
+    # One getReserves (plus the USDC fallback) per token
+    weth_usd = fetch_weth_usd(block_identifier)
+    prices, decimals = {}, {}
+    for symbol, address in entries:
+        cs_addr = _checksum(address)
         # Special-case WETH: use WETH/USD directly
         if cs_addr.lower() == WETH_ADDRESS.lower():
             price_usd = weth_usd
         else:
-            price_in_weth = fetch_token_price_in_weth(cs_addr)
+            price_in_weth = fetch_token_price_in_weth(cs_addr, block_identifier)
             if price_in_weth is None:
                 # Fallback: try direct USDC pair for tokens without WETH pool
-                price_in_usdc = fetch_token_price_in_usdc(cs_addr)
-                if price_in_usdc is None:
-                    print(f"Skipping {symbol} (no DEX liquidity)")
-                    continue
-                price_usd = price_in_usdc
+                price_usd = fetch_token_price_in_usdc(cs_addr, block_identifier)
             else:
                 price_usd = price_in_weth * weth_usd
+        prices[address] = price_usd
+        if price_usd is not None:
+            decimals[address] = get_decimals(cs_addr)
+    return weth_usd, prices, decimals
+
+
+def _bulk_prices(entries, block_identifier):
+    # Same pricing rules as _sequential_prices, resolved for every token at once
+    client = get_w3()
+    weth, usdc = WETH_ADDRESS.lower(), USDC_ADDRESS.lower()
+    tokens = list(dict.fromkeys(address.lower() for _, address in entries))
+    wanted = [(weth, usdc)]
+    for token in tokens:
+        wanted += [(token, quote) for quote in (weth, usdc) if quote != token]
+    reserves = fetch_pair_reserves(wanted, client, block_identifier)
+    # Decimals for every token in one more aggregated call (or none, if cached)
+    metas = resolve_tokens(client, tokens)
+    decimals = {}
+    for token in tokens:
+        # Default to 18 if decimals call fails, as get_decimals does
+        value = metas[_checksum(token)]["decimals"]
+        decimals[token] = 18 if value is None else value
+
+    if (weth, usdc) not in reserves:
+        raise ValueError("No WETH/USDC pair found")
+    weth_usd = _price(*reserves[(weth, usdc)], 18, 6)
+
+    prices = {}
+    for symbol, address in entries:
+        token = address.lower()
+        if token == weth:
+            prices[address] = weth_usd
+            continue
+        price = None
+        if (token, weth) in reserves:
+            reserve_token, reserve_weth = reserves[(token, weth)]
+            if reserve_token and reserve_weth:
+                price = _price(reserve_token, reserve_weth, decimals[token], 18) * weth_usd
+        else:
+            print(f"No Uniswap pair found for {_checksum(address)}")
+        if price is None and (token, usdc) in reserves:
+            reserve_token, reserve_usdc = reserves[(token, usdc)]
+            if reserve_token and reserve_usdc:
+                price = _price(reserve_token, reserve_usdc, decimals[token], 6)
+        prices[address] = price
+    return weth_usd, prices, {address: decimals[address.lower()] for address in prices}
+
+
+def build_price_graph(tokens, block_number, client=None):
+    """Returns (PriceGraph, decimals) over every token/hub pair at `block_number`.
+
+    Built once per block: later calls in the same block are served from memory, and
+    only extend the graph when they bring tokens it hasn't seen.
+    """
+    from price_graph import HUBS, PriceGraph, candidate_pairs
+
+    tokens = {t.lower() for t in tokens}
+    known, graph, decimals = _graphs.get(block_number, (set(), None, None))
+    if graph is None or not tokens <= known:
+        client = client or get_w3()
+        known = known | tokens | set(HUBS)
+        # One aggregated getReserves round (minus cached pairs) and one for decimals
+        reserves = fetch_pair_reserves(candidate_pairs(known), client, block_number)
+        decimals = {}
+        for cs_addr, meta in resolve_tokens(client, known).items():
+            # Default to 18 if decimals call fails, as get_decimals does
+            decimals[cs_addr.lower()] = 18 if meta["decimals"] is None else meta["decimals"]
+        graph = PriceGraph(reserves, decimals)
+        _graphs.clear()
+        _graphs[block_number] = (known, graph, decimals)
+    return graph, decimals
+
+
+def _graph_prices(entries, block_identifier):
+    # Widest-path USD prices from the per-block liquidity graph
+    graph, decimals = build_price_graph([address for _, address in entries], block_identifier)
+    weth_usd = graph.price(WETH_ADDRESS)
+    if weth_usd is None:
+        raise ValueError("No WETH/USDC pair found")
+    prices = {address: graph.price(address) for _, address in entries}
+    return weth_usd, prices, {address: decimals[address.lower()] for address in prices}
+
+
+def _write_exo(entries, weth_usd, prices, decimals, block_number):
+    # exo.json from per-address prices (None = skipped) and decimals
+    exo = {}
+
+    for symbol, address in entries:
+        price_usd = prices[address]
+        if price_usd is None:
+            print(f"Skipping {symbol} (no DEX liquidity)")
+            continue
         lower_addr = address.lower()
-        decimals = get_decimals(cs_addr)
         exo[lower_addr] = {
             "symbol": symbol,
             "price_usd": price_usd,
-            "decimals": decimals
+            "decimals": decimals[address]
         }
         print(f"{lower_addr}: {symbol} {price_usd:.10f} USD")
 
@@ -217,13 +364,153 @@ def build_exo_price_map(token_addresses: Dict[str, str]):
 
     with open("exo.json", "w") as f:
         json.dump(exo, f, indent=2)
+    reserves = reserve_cache.block(block_number)
+    with open(RESERVES_FILE, "w") as f:
+        json.dump({"block": block_number, "reserves": reserves}, f)
+
+    print(f"Saved {len(exo)} token DEX prices to exo.json and {len(reserves)} pair reserves to "
+          f"{RESERVES_FILE} (block {block_number})")
+    return exo
 
-    print(f"Saved {len(exo)} token DEX prices to exo.json")
+
+def load_reserves(path=RESERVES_FILE):
+    """Loads the reserves saved with exo.json into the reserve cache and returns their block.
+
+    Reserve reads at that block (e.g. fetch_pool_depths) are then served without RPCs;
+    only pairs the pricing run never read go out, still pinned to the same block.
+    """
+    with open(path) as f:
+        saved = json.load(f)
+    block_number = saved["block"]
+    reserve_cache.put_many(block_number, {pair: None if value is None else tuple(value)
+                                          for pair, value in saved["reserves"].items()})
+    return block_number
+
+
+def build_exo_price_map(token_addresses: Dict[str, str], bulk: bool = True, block_number: int = None,
+                        graph: bool = GRAPH_PRICING):
+    """Creates and saves exo.json with prices derived from Uniswap
+
+    Every reserve is read at one block (the current one unless `block_number` is given),
+    so all prices in exo.json are consistent and re-pricing within that block hits the
+    reserve cache. The bulk path resolves reserves and decimals for all tokens in a few
+    Multicall3 requests; bulk=False keeps the per-token calls. graph=True prices every
+    token through the multi-hop liquidity graph (WETH/USDC/USDT/DAI hubs) instead.
+    """
+    calls_before = RPC_STATS["eth_call"]
+    if block_number is None:
+        block_number = get_w3().eth.block_number
+    entries = list(_iter_tokens(token_addresses))
+    if graph:
+        pricer = _graph_prices
+    else:
+        pricer = _bulk_prices if bulk else _sequential_prices
+    weth_usd, prices, decimals = pricer(entries, block_number)
+    exo = _write_exo(entries, weth_usd, prices, decimals, block_number)
+    if bulk or graph:
+        print(f"Priced {len(entries)} tokens with {RPC_STATS['eth_call'] - calls_before} RPCs")
 
     # Return map for compatibility with other scripts
     return exo
 
-if __name__ == "__main__":
+
+async def _fetch_reserves_async(rpc, token_address, quote_address, block_number):
+    # fetch_reserves over the async client, sharing the same block-pinned cache
+    if token_address.lower() == quote_address.lower():
+        return None
+    pair_address = pair_for(token_address, quote_address, UNISWAP_DEX)
+    cached = reserve_cache.get_many(block_number, [pair_address])
+    if pair_address in cached:
+        return _orient(cached[pair_address], token_address, quote_address)
+
+    raw = await rpc.eth_call(pair_address, GET_RESERVES_CALL, block_number)
+    # Calls to an address without code succeed with empty return data
+    reserves = (int.from_bytes(raw[:32], "big"), int.from_bytes(raw[32:64], "big")) if len(raw) >= 64 else None
+    reserve_cache.put_many(block_number, {pair_address: reserves})
+    return _orient(reserves, token_address, quote_address)
+
+
+async def _get_decimals_async(rpc, token_address):
+    # get_decimals over the async client; fetched metadata goes into the shared token cache
+    import asyncio
+    from token_metadata import DECIMALS_CALL, NAME_CALL, SYMBOL_CALL, cached_tokens, decode_fields, remember
+
+    cs_addr = _checksum(token_address)
+    meta = cached_tokens([cs_addr]).get(cs_addr)
+    if meta is None:
+        results = await asyncio.gather(*(rpc.try_eth_call(cs_addr, call) for call in (SYMBOL_CALL, NAME_CALL, DECIMALS_CALL)))
+        fields = decode_fields(*results)
+        remember([(cs_addr, *fields)])
+        decimals = fields[2]
+    else:
+        decimals = meta["decimals"]
+    # Default to 18 if decimals call fails
+    return 18 if decimals is None else decimals
+
+
+async def _price_token_async(rpc, address, weth_usd, block_number):
+    # Same rules as _sequential_prices for one token: WETH pair, then direct USDC pair
+    cs_addr = _checksum(address)
+    if cs_addr.lower() == WETH_ADDRESS.lower():
+        return weth_usd, await _get_decimals_async(rpc, cs_addr)
+
+    price_usd = None
+    reserves = await _fetch_reserves_async(rpc, cs_addr, WETH_ADDRESS, block_number)
+    if reserves is None:
+        print(f"No Uniswap pair found for {cs_addr}")
+    elif reserves[0] and reserves[1]:
+        price_usd = _price(*reserves, await _get_decimals_async(rpc, cs_addr), 18) * weth_usd
+    if price_usd is None:
+        reserves = await _fetch_reserves_async(rpc, cs_addr, USDC_ADDRESS, block_number)
+        if reserves is not None and reserves[0] and reserves[1]:
+            price_usd = _price(*reserves, await _get_decimals_async(rpc, cs_addr), 6)
+    if price_usd is None:
+        return None, None
+    return price_usd, await _get_decimals_async(rpc, cs_addr)
+
+
+async def build_exo_price_map_async(token_addresses: Dict[str, str], url: str = None, block_number: int = None,
+                                    **rpc_options):
+    """Async variant of build_exo_price_map that prices all tokens concurrently.
+
+    `rpc_options` (concurrency, rate, burst, deadline) go to async_rpc.AsyncRpc. A token
+    whose requests fail or miss their deadline is skipped on its own; everything else,
+    including exo.json, matches the sync path.
+    """
+    import asyncio
+    from async_rpc import AsyncRpc
+
+    url = url or RPC_URL or SECONDARY_RPC or PRIMARY_RPC
+    if not url:
+        raise RuntimeError("No Ethereum RPC configured. Set INFURA_URL or QUICKNODE_ENDPOINT.")
+    entries = list(_iter_tokens(token_addresses))
+
+    async with AsyncRpc(url, **rpc_options) as rpc:
+        if block_number is None:
+            block_number = await rpc.block_number()
+        reserves = await _fetch_reserves_async(rpc, WETH_ADDRESS, USDC_ADDRESS, block_number)
+        if reserves is None:
+            raise ValueError("No WETH/USDC pair found")
+        weth_usd = _price(*reserves, 18, 6)
+
+        results = await asyncio.gather(
+            *(_price_token_async(rpc, address, weth_usd, block_number) for _, address in entries),
+            return_exceptions=True,
+        )
+
+    prices, decimals = {}, {}
+    for (symbol, address), result in zip(entries, results):
+        if isinstance(result, BaseException):
+            print(f"Pricing {symbol} failed: {result!r}")
+            result = (None, None)
+        prices[address], decimals[address] = result
+    exo = _write_exo(entries, weth_usd, prices, decimals, block_number)
+    print(f"Priced {len(entries)} tokens with {rpc.stats['requests']} RPCs "
+          f"({rpc.stats['timeouts']} timed out, {rpc.stats['errors']} failed)")
+    return exo
+
+
+def main():
     # Example token list (symbol -> address)
     tokens = {
         "WETH": "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
@@ -233,4 +520,8 @@ if __name__ == "__main__":
         # Add more as needed
     }
 
-    build_exo_price_map(tokens)
+    return build_exo_price_map(tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+from array import array
+
+
 class Transaction:
-    def __init__(self, source_token, dest_token, quantity, rate):
+    __slots__ = ("src", "dst", "q", "r", "src_symbol", "dst_symbol", "gas_fee_eth", "gas_fee_usd", "tx_hash")
+
+    def __init__(self, source_token, dest_token, quantity, rate, tx_hash=None):
         self.src = source_token
         self.dst = dest_token
         self.q = quantity
@@ -8,6 +13,119 @@ class Transaction:
         self.dst_symbol = None
         self.gas_fee_eth = None
         self.gas_fee_usd = None
+        self.tx_hash = tx_hash
 
     def __repr__(self):
         return f"{self.src}->{self.dst} q={self.q} r={self.r}"
+
+
+# Structure-of-arrays batch for large pools.
+# Tokens and symbols are interned to integer ids and q, r and gas fees live in float64
+# columns, so a batch of hundreds of thousands of txs is a handful of flat arrays instead
+# of as many objects. Columns come out as NumPy arrays; a Transaction is only built when
+# a single row is asked for (e.g. the txs an optimizer decides to execute).
+
+_INT_COLUMNS = ("src", "dst", "src_symbol", "dst_symbol")
+_FLOAT_COLUMNS = ("q", "r", "gas_fee_eth", "gas_fee_usd")
+
+
+class TransactionBatch:
+    """Columns src/dst (token ids), q, r, gas_fee_eth/usd (float64, NaN = unknown)."""
+
+    def __init__(self):
+        # id -> token / symbol, and the reverse lookups
+        self.tokens = []
+        self.symbols = []
+        self._token_ids = {}
+        self._symbol_ids = {}
+        # Symbol ids are -1 when unknown
+        self._columns = {name: array("q") for name in _INT_COLUMNS}
+        self._columns.update({name: array("d") for name in _FLOAT_COLUMNS})
+        self._arrays = {}
+
+    @classmethod
+    def from_transactions(cls, txs):
+        batch = cls()
+        for tx in txs:
+            batch.append(tx.src, tx.dst, tx.q, tx.r, getattr(tx, "src_symbol", None), getattr(tx, "dst_symbol", None),
+                         getattr(tx, "gas_fee_eth", None), getattr(tx, "gas_fee_usd", None))
+        return batch
+
+    def token_id(self, token):
+        if token not in self._token_ids:
+            self._token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return self._token_ids[token]
+
+    def _symbol_id(self, symbol):
+        if symbol is None:
+            return -1
+        if symbol not in self._symbol_ids:
+            self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self._symbol_ids[symbol]
+
+    def append(self, src, dst, q, r, src_symbol=None, dst_symbol=None, gas_fee_eth=None, gas_fee_usd=None):
+        nan = float("nan")
+        columns = self._columns
+        columns["src"].append(self.token_id(src))
+        columns["dst"].append(self.token_id(dst))
+        columns["src_symbol"].append(self._symbol_id(src_symbol))
+        columns["dst_symbol"].append(self._symbol_id(dst_symbol))
+        columns["q"].append(q)
+        columns["r"].append(r)
+        columns["gas_fee_eth"].append(nan if gas_fee_eth is None else gas_fee_eth)
+        columns["gas_fee_usd"].append(nan if gas_fee_usd is None else gas_fee_usd)
+        self._arrays.clear()
+
+    def column(self, name):
+        """NumPy copy of a column (cached until the next append)."""
+        if name not in self._arrays:
+            import numpy as np
+
+            dtype = np.int64 if name in _INT_COLUMNS else np.float64
+            self._arrays[name] = np.frombuffer(self._columns[name], dtype=dtype).copy()
+        return self._arrays[name]
+
+    src = property(lambda self: self.column("src"))
+    dst = property(lambda self: self.column("dst"))
+    q = property(lambda self: self.column("q"))
+    r = property(lambda self: self.column("r"))
+    gas_fee_eth = property(lambda self: self.column("gas_fee_eth"))
+    gas_fee_usd = property(lambda self: self.column("gas_fee_usd"))
+
+    def __len__(self):
+        return len(self._columns["q"])
+
+    def __getitem__(self, i):
+        """Row `i` as a Transaction."""
+        columns = self._columns
+        tx = Transaction(self.tokens[columns["src"][i]], self.tokens[columns["dst"][i]], columns["q"][i], columns["r"][i])
+        src_symbol, dst_symbol = columns["src_symbol"][i], columns["dst_symbol"][i]
+        tx.src_symbol = self.symbols[src_symbol] if src_symbol >= 0 else None
+        tx.dst_symbol = self.symbols[dst_symbol] if dst_symbol >= 0 else None
+        gas_fee_eth, gas_fee_usd = columns["gas_fee_eth"][i], columns["gas_fee_usd"][i]
+        tx.gas_fee_eth = None if gas_fee_eth != gas_fee_eth else gas_fee_eth
+        tx.gas_fee_usd = None if gas_fee_usd != gas_fee_usd else gas_fee_usd
+        return tx
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def symbol(self, i, side="src"):
+        symbol = self._columns[f"{side}_symbol"][i]
+        return self.symbols[symbol] if symbol >= 0 else None
+
+    def take(self, indices):
+        """New batch with the rows at `indices` (a mask or index array), sharing the id tables."""
+        import numpy as np
+
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        batch = TransactionBatch()
+        batch.tokens, batch._token_ids = self.tokens, self._token_ids
+        batch.symbols, batch._symbol_ids = self.symbols, self._symbol_ids
+        for name, values in self._columns.items():
+            batch._columns[name] = array(values.typecode, self.column(name)[indices].tobytes())
+        return batch
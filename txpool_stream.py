@@ -0,0 +1,215 @@
+import json
+import re
+
+# Incremental reader for `txpool_content` dumps.
+# Walks result -> pending -> sender -> nonce -> tx one entry at a time so
+# memory stays bounded by the read chunk plus a single transaction object,
+# no matter how large the pool is.
+
+CHUNK_SIZE = 1 << 20
+
+# Characters that change nesting depth or open a string while skipping a value
+_STRUCTURAL = re.compile(rb'[{}\[\]"]')
+# Characters that end or escape inside a JSON string
+_STRING_END = re.compile(rb'["\\]')
+# Delimiters ending a number/true/false/null
+_SCALAR_END = re.compile(rb"[,}\]\s]")
+_WHITESPACE = b" \t\r\n"
+
+
+class _ByteReader:
+    """Buffered cursor over a binary file with just enough JSON awareness to walk objects."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        # Drop consumed bytes and pull the next chunk; False when the file is exhausted
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        # Next non-whitespace byte without consuming it
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos:self.pos + 1]
+            if not self._fill():
+                return b""
+
+    def expect(self, ch):
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"Malformed txpool dump: expected {ch!r}, got {got!r}")
+        self.pos += 1
+
+    def read_string(self):
+        # Decode a JSON string starting at the cursor (keys are short: addresses and nonces)
+        self.expect(b'"')
+        quote = self.pos - 1
+        i = self.pos
+        while True:
+            m = _STRING_END.search(self.buf, i)
+            if m is not None and m.group() == b'"':
+                raw = self.buf[quote:m.end()]
+                self.pos = m.end()
+                return json.loads(raw)
+            if m is not None and m.end() < len(self.buf):
+                # Escaped character, skip it
+                i = m.end() + 1
+                continue
+            # String runs past the buffer: keep it from the opening quote and read on
+            offset = (len(self.buf) if m is None else m.start()) - quote
+            self.pos = quote
+            if not self._fill():
+                raise ValueError("Malformed txpool dump: unterminated string")
+            quote = self.pos
+            i = quote + offset
+
+    def read_value(self, keep=True):
+        """Consumes the next JSON value; returns its raw bytes when keep is set."""
+        first = self.peek()
+        if first not in (b"{", b"["):
+            # Scalars are tiny: read up to the next delimiter
+            if first == b'"':
+                value = self.read_string()
+                return json.dumps(value).encode() if keep else None
+            start = self.pos
+            while True:
+                m = _SCALAR_END.search(self.buf, self.pos)
+                if m is not None:
+                    raw = self.buf[start:m.start()]
+                    self.pos = m.start()
+                    return raw if keep else None
+                self.pos = start
+                if not self._fill():
+                    raw = self.buf[self.pos:]
+                    self.pos = len(self.buf)
+                    return raw if keep else None
+                start = self.pos
+
+        parts = []
+        start = self.pos
+        i = self.pos
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                m = _STRING_END.search(self.buf, i)
+            else:
+                m = _STRUCTURAL.search(self.buf, i)
+            if m is None or (in_string and m.group() == b"\\" and m.end() >= len(self.buf)):
+                # Out of buffered bytes mid-value: stash what we have and keep going
+                cut = len(self.buf) if m is None else m.start()
+                if keep:
+                    parts.append(self.buf[start:cut])
+                self.pos = cut
+                if not self._fill():
+                    raise ValueError("Malformed txpool dump: truncated value")
+                start = self.pos
+                i = self.pos
+                continue
+            ch = m.group()
+            i = m.end()
+            if in_string:
+                if ch == b"\\":
+                    i += 1
+                else:
+                    in_string = False
+            elif ch == b'"':
+                in_string = True
+            elif ch in (b"{", b"["):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    self.pos = i
+                    if keep:
+                        parts.append(self.buf[start:i])
+                        return b"".join(parts)
+                    return None
+
+    def iter_object(self):
+        """Yields keys of the object at the cursor; caller must consume each value."""
+        self.expect(b"{")
+        if self.peek() == b"}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(b":")
+            yield key
+            nxt = self.peek()
+            self.pos += 1
+            if nxt == b"}":
+                return
+            if nxt != b",":
+                raise ValueError(f"Malformed txpool dump: unexpected {nxt!r} in object")
+
+
+def _address_needles(addresses):
+    # Raw-byte patterns for `"to":"0x..."`, matched against the lowercased entry
+    return [f'"{a.lower()}"'.encode() for a in addresses]
+
+
+def iter_txpool(path, addresses=None, section="pending", chunk_size=CHUNK_SIZE):
+    """Yields (sender, nonce, tx) from a txpool_content dump, optionally only txs sent to `addresses`.
+
+    When `addresses` is given, each raw tx entry is checked for the address bytes
+    before any dict is built, so the bulk of the pool is skipped without json parsing.
+    """
+    wanted = {a.lower() for a in addresses} if addresses else None
+    needles = _address_needles(wanted) if wanted else None
+
+    with open(path, "rb") as f:
+        reader = _ByteReader(f, chunk_size)
+        for key in reader.iter_object():
+            if key != "result":
+                reader.read_value(keep=False)
+                continue
+            for result_key in reader.iter_object():
+                if result_key != section:
+                    reader.read_value(keep=False)
+                    continue
+                for sender in reader.iter_object():
+                    for nonce in reader.iter_object():
+                        raw = reader.read_value()
+                        if needles is not None:
+                            lowered = raw.lower()
+                            if not any(n in lowered for n in needles):
+                                continue
+                        tx = json.loads(raw)
+                        if wanted is not None:
+                            to_addr = tx.get("to")
+                            if not to_addr or to_addr.lower() not in wanted:
+                                continue
+                        yield sender, nonce, tx
+            return
+
+
+def load_filtered(path, addresses):
+    """Returns the list of pending txs addressed to any of `addresses`, streaming the dump."""
+    return [tx for _, _, tx in iter_txpool(path, addresses)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    dump = sys.argv[1] if len(sys.argv) > 1 else "sample.dump"
+    router = "0x7a250d5630b4cf539739df2c5dacb4c659f2488d"
+    count = 0
+    for sender, nonce, tx in iter_txpool(dump, {router}):
+        count += 1
+    print(f"Found {count} transactions to {router} in {dump}")